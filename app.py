@@ -1,21 +1,40 @@
+import os
+import re
+import gzip
+import queue
+import hashlib
+import itertools
 import threading
 import uvicorn
-import requests
 import json
 import time
 import pandas as pd
 import numpy as np
 import yfinance as yf
 import pytz 
+from bisect import bisect_right
+from collections import deque
 from datetime import datetime, time as dtime, timedelta
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from typing import Optional
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
+from services.common.alerts import AlertRouter, sinks_from_env
+from services.common.econ_calendar import EconomicCalendar
+from services.common.sentiment import SentimentScorer
+
+# --- SAFE IMPORT BLOCK ---
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    print("⚠️ BROTLI MISSING: Dashboard served with gzip only.")
+    HAS_BROTLI = False
 
 # --- 🔧 CONFIGURATION ---
-DISCORD_WEBHOOK_URL = "https://discordapp.com/api/webhooks/1454098742218330307/gi8wvEn0pMcNsAWIR_kY5-_0_VE4CvsgWjkSXjCasXX-xUrydbhYtxHRLLLgiKxs_pLL"
+DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL") or "https://discordapp.com/api/webhooks/1454098742218330307/gi8wvEn0pMcNsAWIR_kY5-_0_VE4CvsgWjkSXjCasXX-xUrydbhYtxHRLLLgiKxs_pLL"
 
 # 1. ASIA RANGE
 ASIA_OPEN_TIME = dtime(3, 0)   
@@ -25,9 +44,21 @@ ASIA_CLOSE_TIME = dtime(8, 59)
 TRADE_WINDOW_OPEN = dtime(9, 0)
 TRADE_WINDOW_CLOSE = dtime(23, 0) 
 
-# 3. DANGER WORDS (News Filter)
+# 3. KILL ZONE DEPTH (Asia Range multiples)
+SD_MULTIPLIER = 2.5
+
+# 4. DANGER WORDS (News Filter)
 DANGER_KEYWORDS = ["CPI", "PPI", "FED", "POWELL", "HIKE", "INFLATION", "RATES", "FOMC", "NFP", "JOBS"]
 
+# 5. ECONOMIC CALENDAR (Scheduled blackouts: 30 min before -> 60 min after each release)
+ECON_CALENDAR_FILE = os.getenv("FF_ECON_CALENDAR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "economic_calendar.csv"))
+ECON_BLACKOUT_BEFORE = 1800
+ECON_BLACKOUT_AFTER = 3600
+
+# 6. LOG RETENTION (Ring buffer size + optional JSON-lines file sink)
+LOG_RETENTION = int(os.getenv("FF_LOG_RETENTION", "5000"))
+LOG_FILE = os.getenv("FF_LOG_FILE")
+
 # --- 🧠 GLOBAL STATE ---
 GLOBAL_STATE = {
     "settings": {
@@ -65,8 +96,8 @@ GLOBAL_STATE = {
         "narrative": "V4.6 Drift-Proof Initializing...",
         "trade_setup": {"entry": 0, "tp": 0, "sl": 0, "size": 0, "valid": False}
     },
+    "calendar": {"today": [], "blackout": None},
     "performance": {"wins": 0, "total": 0, "win_rate": 0},
-    "logs": [],                 
     "active_trades": [],
     "last_alert_time": 0,
     "last_long_alert": 0,  
@@ -74,9 +105,39 @@ GLOBAL_STATE = {
     "signal_latch": {"active": False, "data": None, "time": 0} 
 }
 
+# --- 🔖 STATE VERSIONING ---
+# Every top-level section of GLOBAL_STATE carries the version at which it last changed.
+# Versions start from the boot time in ms so they keep increasing across restarts.
+STATE_LOCK = threading.Lock()
+STATE_VERSION = int(time.time() * 1000)
+SECTION_VERSIONS = {key: STATE_VERSION for key in GLOBAL_STATE}
+
+def mark_dirty(*sections):
+    global STATE_VERSION
+    with STATE_LOCK:
+        STATE_VERSION += 1
+        for section in sections:
+            SECTION_VERSIONS[section] = STATE_VERSION
+
+def set_state(section, value):
+    # Replace a whole section, bumping its version only on a real change
+    if GLOBAL_STATE[section] != value:
+        GLOBAL_STATE[section] = value
+        mark_dirty(section)
+
+def update_state(section, **fields):
+    # Patch fields of a section, bumping its version only on a real change
+    target = GLOBAL_STATE[section]
+    changed = {k: v for k, v in fields.items() if target.get(k) != v}
+    if changed:
+        target.update(changed)
+        mark_dirty(section)
+
 app = FastAPI()
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
-analyzer = SentimentIntensityAnalyzer()
+app.add_middleware(GZipMiddleware, minimum_size=500)
+scorer = SentimentScorer()
+CALENDAR = EconomicCalendar.load(ECON_CALENDAR_FILE, before=ECON_BLACKOUT_BEFORE, after=ECON_BLACKOUT_AFTER, tz=pytz.timezone('Africa/Johannesburg'))
 
 # --- API MODELS ---
 class SettingsUpdate(BaseModel):
@@ -92,19 +153,43 @@ class RiskUpdate(BaseModel):
     risk_pct: float
 
 # --- 📝 LOGGING SYSTEM ---
-def log_msg(type, text):
-    timestamp = datetime.now(pytz.timezone('Africa/Johannesburg')).strftime('%H:%M:%S')
-    icon = "ℹ️"
-    if type == "TRADE": icon = "🦁"
-    elif type == "ALERT": icon = "🚨"
-    elif type == "NEWS": icon = "📰"
-    elif type == "SYS": icon = "⚙️"
+# Records live in a bounded deque, in sequence order. Numbering and appending happen under
+# one small lock, otherwise a thread switch between them could store records out of order.
+LOG_BUFFER = deque(maxlen=LOG_RETENTION)
+LOG_SEQ = itertools.count(1)
+LOG_LOCK = threading.Lock()
+LOG_SINK = queue.Queue(maxsize=10000) if LOG_FILE else None
+LOG_ICONS = {"TRADE": "🦁", "ALERT": "🚨", "NEWS": "📰", "SYS": "⚙️"}
+
+def log_msg(type, text, level=None):
+    now = datetime.now(pytz.timezone('Africa/Johannesburg'))
+    timestamp = now.strftime('%H:%M:%S')
+    icon = LOG_ICONS.get(type, "ℹ️")
     
     log_entry = f"[{timestamp}] {icon} {text}"
-    GLOBAL_STATE["logs"].insert(0, log_entry)
-    if len(GLOBAL_STATE["logs"]) > 50: GLOBAL_STATE["logs"].pop()
+    record = {
+        "ts": now.timestamp(),
+        "level": level or ("WARN" if type == "ALERT" else "INFO"),
+        "type": type,
+        "text": text,
+        "line": log_entry
+    }
+    with LOG_LOCK:
+        record["seq"] = next(LOG_SEQ)
+        LOG_BUFFER.append(record)
+    if LOG_SINK is not None:
+        try: LOG_SINK.put_nowait(record)
+        except queue.Full: pass  # Never block a worker on disk I/O
     print(log_entry, flush=True)
 
+def run_log_sink():
+    # Drains queued records to LOG_FILE as JSON lines, off the trading threads
+    with open(LOG_FILE, "a", encoding="utf-8") as f:
+        while True:
+            record = LOG_SINK.get()
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if LOG_SINK.empty(): f.flush()
+
 # --- 🧮 RISK CALCULATOR ---
 def calculate_position_size(entry, sl):
     try:
@@ -121,17 +206,15 @@ def calculate_position_size(entry, sl):
         return 0, 0
 
 # --- 🔔 DISCORD ALERT SYSTEM ---
+# The strategy loop only enqueues; cooldowns (per instrument + direction), coalescing,
+# rate limits and delivery all live on the router and its sinks.
+ALERT_COOLDOWN = 1800
+alerts = AlertRouter(sinks_from_env(DISCORD_WEBHOOK_URL, on_failure=lambda text: log_msg("SYS", text, level="ERROR")), cooldown=ALERT_COOLDOWN)
+
 def send_discord_alert(data, asset):
     current_time = time.time()
     bias = data['bias']
 
-    if bias == "LONG":
-        if current_time - GLOBAL_STATE["last_long_alert"] < 1800: return
-        GLOBAL_STATE["last_long_alert"] = current_time
-    elif bias == "SHORT":
-        if current_time - GLOBAL_STATE["last_short_alert"] < 1800: return
-        GLOBAL_STATE["last_short_alert"] = current_time
-
     try:
         current_offset = GLOBAL_STATE["settings"]["offset"]
         
@@ -141,7 +224,6 @@ def send_discord_alert(data, asset):
         raw_sl = data['trade_setup']['sl']
         
         lots, risk_usd = calculate_position_size(raw_entry, raw_sl)
-        GLOBAL_STATE["prediction"]["trade_setup"]["size"] = lots
 
         color = 5763719 if bias == "LONG" else 15548997
         style_icon = "🦁" 
@@ -159,7 +241,11 @@ def send_discord_alert(data, asset):
             ],
             "footer": {"text": f"ForwardFin V4.7 • Drift-Proof Engine"}
         }
-        requests.post(DISCORD_WEBHOOK_URL, json={"embeds": [embed]})
+        # Still cooling down for this instrument + direction
+        if not alerts.publish({"instrument": asset, "direction": bias, "time": current_time, "embed": embed}): return
+
+        GLOBAL_STATE["prediction"]["trade_setup"]["size"] = lots
+        GLOBAL_STATE["last_long_alert" if bias == "LONG" else "last_short_alert"] = current_time
         GLOBAL_STATE["last_alert_time"] = current_time
         
         ui_data = data.copy()
@@ -167,55 +253,101 @@ def send_discord_alert(data, asset):
         GLOBAL_STATE["signal_latch"]["active"] = True
         GLOBAL_STATE["signal_latch"]["data"] = ui_data
         GLOBAL_STATE["signal_latch"]["time"] = current_time
+        mark_dirty("prediction", "last_long_alert", "last_short_alert", "last_alert_time", "signal_latch")
         
-        log_msg("ALERT", f"Sent {bias} Signal. Target: {lots} Lots.")
+        log_msg("ALERT", f"Queued {bias} Signal. Target: {lots} Lots.")
     except Exception as e:
-        log_msg("SYS", f"Discord Error: {e}")
+        log_msg("SYS", f"Discord Error: {e}", level="ERROR")
 
 # --- 📰 NEWS SCANNER ---
+# Runs on its own thread so the data loop never waits on news HTTP. Articles are cached
+# by ID and matched once; every danger headline keeps trading paused for NEWS_DANGER_WINDOW
+# after publication, so the halt decays on its own instead of hinging on the latest item.
+# Seen IDs are remembered separately (last NEWS_SEEN_LIMIT), so old or undated articles the
+# feed keeps returning are not re-scored once they drop out of the cache.
+NEWS_SCAN_INTERVAL = 60
+NEWS_DANGER_WINDOW = 7200
+NEWS_SEEN_LIMIT = 2000
+DANGER_PATTERN = re.compile(r"\b(" + "|".join(map(re.escape, DANGER_KEYWORDS)) + r")\b", re.IGNORECASE)
+NEWS_CACHE = {}  # article id -> {"title", "published", "sentiment", "danger_word"}
+NEWS_SEEN = deque(maxlen=NEWS_SEEN_LIMIT)
+NEWS_SEEN_IDS = set()
+
+def mark_seen(article_id):
+    if len(NEWS_SEEN) == NEWS_SEEN.maxlen: NEWS_SEEN_IDS.discard(NEWS_SEEN[0])
+    NEWS_SEEN.append(article_id)
+    NEWS_SEEN_IDS.add(article_id)
+
+def parse_article(item):
+    # yfinance has shipped both a flat and a nested ("content") news format
+    content = item.get("content") or item
+    title = content.get("title") or ""
+    published = item.get("providerPublishTime") or 0
+    if not published and content.get("pubDate"):
+        try: published = datetime.fromisoformat(content["pubDate"].replace("Z", "+00:00")).timestamp()
+        except ValueError: published = 0
+    return item.get("uuid") or item.get("id") or content.get("id") or title, title, float(published)
+
 def check_news():
     try:
-        ticker = yf.Ticker("NQ=F")
-        news_items = ticker.news
-        found_danger = False
-        danger_word = ""
-        
-        if news_items:
-            latest = news_items[0]
-            title = latest['title'].upper()
-            pub_time = latest.get('providerPublishTime', 0)
-            
-            if time.time() - pub_time < 7200:
-                for word in DANGER_KEYWORDS:
-                    if word in title:
-                        found_danger = True
-                        danger_word = word
-                        break
-            
-            status_msg = f"Last: {title[:30]}..."
-            if found_danger:
-                status_msg = f"⛔ DANGER: '{danger_word}' detected!"
-                log_msg("NEWS", f"Trading PAUSED. Detected: {danger_word}")
-            
-            GLOBAL_STATE["news"] = {
-                "is_danger": found_danger,
-                "headline": status_msg,
-                "last_scan": datetime.now().strftime('%H:%M')
-            }
+        news_items = yf.Ticker("NQ=F").news or []
+        now = time.time()
+        newly_dangerous = []
+        fresh = []
+        for item in news_items:
+            article_id, title, published = parse_article(item)
+            if article_id in NEWS_SEEN_IDS or any(article_id == f[0] for f in fresh): continue
+            fresh.append((article_id, title, published))
+
+        # Only unseen headlines are scored, in one batch, before anything is cached: if scoring
+        # fails the articles stay unseen and are retried on the next scan
+        scores = scorer.score_batch([title for _, title, _ in fresh]) if fresh else []
+        for (article_id, title, published), score in zip(fresh, scores):
+            mark_seen(article_id)
+            match = DANGER_PATTERN.search(title)
+            NEWS_CACHE[article_id] = {"title": title.upper(), "published": published, "sentiment": score,
+                                      "danger_word": match.group(1).upper() if match else None}
+            if match and now - published < NEWS_DANGER_WINDOW: newly_dangerous.append(NEWS_CACHE[article_id])
+
+        # Forget articles that can no longer trigger a halt (their IDs stay in NEWS_SEEN)
+        for article_id in [k for k, a in NEWS_CACHE.items() if now - a["published"] > 2 * NEWS_DANGER_WINDOW]:
+            del NEWS_CACHE[article_id]
+
+        for article in newly_dangerous:
+            log_msg("NEWS", f"Trading PAUSED. Detected: {article['danger_word']}")
+
+        active = [a for a in NEWS_CACHE.values() if a["danger_word"] and now - a["published"] < NEWS_DANGER_WINDOW]
+        if active:
+            latest = max(active, key=lambda a: a["published"])
+            status_msg = f"⛔ DANGER: '{latest['danger_word']}' detected!"
+        elif NEWS_CACHE:
+            latest = max(NEWS_CACHE.values(), key=lambda a: a["published"])
+            status_msg = f"Last: {latest['title'][:30]}..."
+        else:
+            return
+
+        recent = [a["sentiment"] for a in NEWS_CACHE.values() if now - a["published"] < NEWS_DANGER_WINDOW]
+        set_state("news", {
+            "is_danger": bool(active),
+            "headline": status_msg,
+            "sentiment": round(sum(recent) / len(recent), 3) if recent else 0.0,
+            "last_scan": datetime.now().strftime('%H:%M')
+        })
     except Exception as e:
         print(f"News Error: {e}")
 
+def run_news_scanner():
+    while True:
+        check_news()
+        time.sleep(NEWS_SCAN_INTERVAL)
+
 # --- WORKER 1: REAL FUTURES DATA ---
 def run_market_data_stream():
     log_msg("SYS", "Connecting to Dual Streams (NQ + ES)...")
-    tick_count = 0
     while True:
         try:
             tickers = "NQ=F ES=F"
             data = yf.download(tickers, period="5d", interval="1m", progress=False, group_by='ticker')
-            
-            if tick_count % 30 == 0: check_news()
-            tick_count += 1
 
             if GLOBAL_STATE["settings"]["asset"] == "NQ1!":
                 main_ticker, aux_ticker = "NQ=F", "ES=F"
@@ -256,6 +388,7 @@ def run_market_data_stream():
                 GLOBAL_STATE["market_data"]["df"] = df_main
                 GLOBAL_STATE["market_data"]["aux_data"][main_key] = df_main 
                 GLOBAL_STATE["market_data"]["aux_data"][aux_key] = df_aux
+                mark_dirty("market_data")
                 
         except Exception as e:
             print(f"Data Error: {e}")
@@ -276,6 +409,47 @@ def resample_to_5m(df):
     df_5m = df.resample('5min').apply(ohlc_dict).dropna()
     return df_5m
 
+# --- HELPER: CHART BARS ---
+BAR_TIMEFRAMES = {"1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min", "1h": "1h"}
+BAR_SYMBOLS = {"NQ": "NQ", "NQ=F": "NQ", "NQ1!": "NQ", "ES": "ES", "ES=F": "ES", "ES1!": "ES"}
+
+def resample_ohlcv(df, tf):
+    if tf == "1m": return df
+    ohlcv_dict = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    return df.resample(BAR_TIMEFRAMES[tf]).agg(ohlcv_dict).dropna()
+
+def downsample_ohlcv(df, max_points):
+    # Min/max bucketing: every bucket keeps its first open, highest high, lowest low and
+    # last close, so wicks survive no matter how far the series is compressed.
+    times = df.index.as_unit('s').asi8.astype(np.int64)  # Index resolution varies (ns/us/s)
+    o, h, l, c = (df[col].to_numpy(dtype=float) for col in ('Open', 'High', 'Low', 'Close'))
+    v = df['Volume'].to_numpy(dtype=float)
+    if len(df) <= max_points:
+        return times, o, h, l, c, v
+    starts = np.unique(np.linspace(0, len(df), max_points, endpoint=False).astype(np.int64))
+    ends = np.append(starts[1:], len(df)) - 1
+    return (times[starts], o[starts], np.maximum.reduceat(h, starts), np.minimum.reduceat(l, starts),
+            c[ends], np.add.reduceat(v, starts))
+
+def asia_overlays(df):
+    # One Asia range per session day, with the SD kill zones projected from it
+    mask = (df.index.time >= ASIA_OPEN_TIME) & (df.index.time <= ASIA_CLOSE_TIME)
+    asia = df.loc[mask]
+    overlays = []
+    for day, session in asia.groupby(asia.index.date):
+        high, low = float(session['High'].max()), float(session['Low'].min())
+        leg_range = high - low
+        overlays.append({
+            "date": day.isoformat(),
+            "start": int(session.index[0].timestamp()),
+            "end": int(session.index[-1].timestamp()),
+            "high": round(high, 2),
+            "low": round(low, 2),
+            "buy_zone": round(low - leg_range * SD_MULTIPLIER, 2),
+            "sell_zone": round(high + leg_range * SD_MULTIPLIER, 2)
+        })
+    return overlays
+
 # --- HELPER: SMT DIVERGENCE CHECK ---
 def check_smt_divergence(main_df, aux_df, sweep_type):
     if aux_df is None or main_df is None: return False
@@ -330,18 +504,24 @@ def run_strategy_engine():
             sa_tz = pytz.timezone('Africa/Johannesburg')
             now_time = datetime.now(sa_tz).time()
             if not (TRADE_WINDOW_OPEN <= now_time <= TRADE_WINDOW_CLOSE):
-                GLOBAL_STATE["prediction"] = {
+                set_state("prediction", {
                     "bias": "CLOSED",
                     "probability": 0,
                     "narrative": f"😴 Market Closed. Trading Window: {TRADE_WINDOW_OPEN.strftime('%H:%M')} - {TRADE_WINDOW_CLOSE.strftime('%H:%M')} SAST.",
                     "trade_setup": {"entry": 0, "tp": 0, "sl": 0, "valid": False}
-                }
+                })
                 time.sleep(5); continue 
 
+            # CALENDAR BLOCK (Scheduled releases: one binary search per tick)
+            blackout = CALENDAR.blackout(time.time())
+            set_state("calendar", {"today": CALENDAR.events_on(datetime.now(sa_tz).date()), "blackout": blackout})
+            if blackout:
+                update_state("prediction", bias="PAUSED", narrative=f"⛔ TRADING HALTED.\nScheduled Event: {blackout}")
+                time.sleep(5); continue
+
             # NEWS BLOCK
             if GLOBAL_STATE["news"]["is_danger"]:
-                GLOBAL_STATE["prediction"]["bias"] = "PAUSED"
-                GLOBAL_STATE["prediction"]["narrative"] = f"⛔ TRADING HALTED.\nNews Event: {GLOBAL_STATE['news']['headline']}"
+                update_state("prediction", bias="PAUSED", narrative=f"⛔ TRADING HALTED.\nNews Event: {GLOBAL_STATE['news']['headline']}")
                 time.sleep(5); continue
 
             # Analysis
@@ -360,21 +540,20 @@ def run_strategy_engine():
                 elif current_price > asia_info['high']: 
                     is_monitoring_smt = check_smt_divergence(df, df_aux, "HIGH")
             
-            GLOBAL_STATE["market_data"]["smt_detected"] = is_monitoring_smt
+            update_state("market_data", smt_detected=is_monitoring_smt)
 
             if asia_info:
                 high = asia_info['high']
                 low = asia_info['low']
                 # [NEW] Store Relative Levels
-                GLOBAL_STATE["market_data"]["session_high"] = high - current_offset
-                GLOBAL_STATE["market_data"]["session_low"] = low - current_offset
+                update_state("market_data", session_high=high - current_offset, session_low=low - current_offset)
 
                 if asia_info['is_closed']: 
                     leg_range = high - low
                     
                     # 2.5 SD LOGIC (KEPT AS REQUESTED)
-                    buy_zone = low - (leg_range * 2.5)
-                    sell_zone = high + (leg_range * 2.5)
+                    buy_zone = low - (leg_range * SD_MULTIPLIER)
+                    sell_zone = high + (leg_range * SD_MULTIPLIER)
 
                     if current_price < low:
                         narrative = f"⚠️ Asia Low Swept. Monitoring for 2.5 SD."
@@ -420,11 +599,12 @@ def run_strategy_engine():
                 else:
                     narrative = "⏳ Asia Session Active (03:00-08:59 SAST).\nRecording Highs and Lows..."
 
-            GLOBAL_STATE["prediction"] = {"bias": bias, "probability": prob, "narrative": narrative, "trade_setup": setup}
+            set_state("prediction", {"bias": bias, "probability": prob, "narrative": narrative, "trade_setup": setup})
 
             if bias != "NEUTRAL":
                 if not any(t for t in GLOBAL_STATE["active_trades"] if time.time() - t['time'] < 300):
                     GLOBAL_STATE["active_trades"].append({"type": bias, "entry": current_price, "time": time.time()})
+                    mark_dirty("active_trades")
                     send_discord_alert(GLOBAL_STATE["prediction"], GLOBAL_STATE["settings"]["asset"])
 
             # Grading
@@ -435,28 +615,187 @@ def run_strategy_engine():
                     GLOBAL_STATE["performance"]["total"] += 1
                     if is_win: GLOBAL_STATE["performance"]["wins"] += 1
                     GLOBAL_STATE["active_trades"].remove(trade)
+                    mark_dirty("active_trades", "performance")
 
             total = GLOBAL_STATE["performance"]["total"]
             wins = GLOBAL_STATE["performance"]["wins"]
-            GLOBAL_STATE["performance"]["win_rate"] = int((wins/total)*100) if total > 0 else 0
+            update_state("performance", win_rate=int((wins/total)*100) if total > 0 else 0)
 
         except Exception as e:
-            log_msg("SYS", f"Brain Error: {e}")
+            log_msg("SYS", f"Brain Error: {e}", level="ERROR")
         # [UPDATED] Sleep 3s (Was 10s)
         time.sleep(3)
 
+# --- 📦 STATIC DASHBOARD ---
+# Assets are read, fingerprinted and precompressed once at startup; requests only pick a variant.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+    ".png": "image/png",
+    ".svg": "image/svg+xml",
+}
+COMPRESSIBLE_TYPES = (".html", ".css", ".js", ".svg")
+
+def load_static_assets():
+    raw = {}
+    for name in sorted(os.listdir(STATIC_DIR)):
+        if os.path.splitext(name)[1] in STATIC_TYPES:
+            with open(os.path.join(STATIC_DIR, name), "rb") as f: raw[name] = f.read()
+    digests = {name: hashlib.sha256(body).hexdigest()[:16] for name, body in raw.items()}
+
+    assets = {}
+    for name, body in raw.items():
+        ext = os.path.splitext(name)[1]
+        if ext == ".html":
+            # Pin asset URLs to their fingerprint so browsers can cache them forever
+            for ref, digest in digests.items():
+                if ref != name: body = body.replace(f'/static/{ref}"'.encode(), f'/static/{ref}?v={digest}"'.encode())
+        variants = {"identity": body}
+        if ext in COMPRESSIBLE_TYPES:
+            variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if HAS_BROTLI: variants["br"] = brotli.compress(body, quality=11)
+        assets[name] = {
+            "type": STATIC_TYPES[ext],
+            "digest": hashlib.sha256(body).hexdigest()[:16],
+            "variants": variants,
+        }
+    return assets
+
+STATIC_ASSETS = load_static_assets()
+
+def pick_encoding(accept_encoding, variants):
+    accepted = {}
+    for token in accept_encoding.split(","):
+        name, _, params = token.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try: q = float(params.strip()[2:])
+            except ValueError: q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in ("br", "gzip"):
+        if encoding in variants and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+def serve_static(request, name):
+    asset = STATIC_ASSETS.get(name)
+    if asset is None: return Response(status_code=404)
+
+    encoding = pick_encoding(request.headers.get("accept-encoding", ""), asset["variants"])
+    # Strong ETags must differ per encoding, since the bytes differ
+    etag = f'"{asset["digest"]}"' if encoding == "identity" else f'"{asset["digest"]}-{encoding}"'
+    if asset["type"].startswith("text/html"):
+        cache_control = "no-cache"
+    elif request.query_params.get("v") == asset["digest"]:
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "public, max-age=300"
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity": headers["Content-Encoding"] = encoding
+    return Response(content=asset["variants"][encoding], media_type=asset["type"], headers=headers)
+
 # --- API ROUTES ---
+# Serialized full snapshot, reused by every poll until the state version moves
+LIVE_CACHE = {"version": None, "body": None}
+
+def public_section(key):
+    value = GLOBAL_STATE[key]
+    if key == "market_data":
+        value = {k: v for k, v in value.items() if k not in ("df", "aux_data")}
+        if value["adjusted_price"] > 0:
+            value["price"] = value["adjusted_price"]
+    return value
+
+def render_json(payload):
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
 @app.get("/api/live-data")
-async def get_api():
-    safe_state = GLOBAL_STATE.copy()
-    safe_state["market_data"] = GLOBAL_STATE["market_data"].copy()
-    if "df" in safe_state["market_data"]: del safe_state["market_data"]["df"]
-    if "aux_data" in safe_state["market_data"]: del safe_state["market_data"]["aux_data"]
-    
-    if safe_state["market_data"]["adjusted_price"] > 0:
-        safe_state["market_data"]["price"] = safe_state["market_data"]["adjusted_price"]
-        
-    return safe_state
+async def get_api(request: Request, since: Optional[int] = None):
+    # Read the version BEFORE the sections: a concurrent write can then only make
+    # the payload newer than its label, so the client re-fetches rather than misses it.
+    version = STATE_VERSION
+    etag = f'W/"{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if since is None or since > version:
+        if LIVE_CACHE["version"] != version:
+            payload = {key: public_section(key) for key in GLOBAL_STATE}
+            payload["version"] = version
+            LIVE_CACHE["body"] = render_json(payload)
+            LIVE_CACHE["version"] = version
+        body = LIVE_CACHE["body"]
+    else:
+        payload = {key: public_section(key) for key, v in list(SECTION_VERSIONS.items()) if v > since}
+        payload["version"] = version
+        payload["since"] = since
+        body = render_json(payload)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/alerts")
+async def get_alert_stats():
+    return alerts.snapshot()
+
+@app.get("/api/bars")
+def get_bars(symbol: str = "NQ", tf: str = "1m", start: Optional[int] = Query(None, alias="from"),
+             end: Optional[int] = Query(None, alias="to"), max_points: int = 500):
+    # Served from the 5-day 1m frames the market data worker already holds in memory
+    key = BAR_SYMBOLS.get(symbol.upper())
+    if key is None or tf not in BAR_TIMEFRAMES:
+        return {"status": "error", "message": f"Unsupported symbol/tf: {symbol}/{tf}"}
+    df = GLOBAL_STATE["market_data"]["aux_data"].get(key)
+    if df is None or df.empty:
+        return {"status": "error", "message": "No bars loaded yet"}
+
+    if start is not None: df = df[df.index >= pd.Timestamp(start, unit='s', tz='UTC')]
+    if end is not None: df = df[df.index <= pd.Timestamp(end, unit='s', tz='UTC')]
+    bars = resample_ohlcv(df, tf)
+    t, o, h, l, c, v = downsample_ohlcv(bars, max(10, max_points))
+
+    return {
+        "symbol": key,
+        "tf": tf,
+        "offset": GLOBAL_STATE["settings"]["offset"],
+        "downsampled": len(t) < len(bars),
+        "t": t.tolist(),
+        "o": np.round(o, 2).tolist(),
+        "h": np.round(h, 2).tolist(),
+        "l": np.round(l, 2).tolist(),
+        "c": np.round(c, 2).tolist(),
+        "v": v.astype(np.int64).tolist(),
+        "overlays": {"asia": asia_overlays(df)}
+    }
+
+@app.get("/api/logs")
+async def get_logs(after: Optional[int] = None, limit: int = 100):
+    # Cursor pagination over the ring buffer: ?after=<seq> returns only newer records
+    with LOG_LOCK:
+        entries = list(LOG_BUFFER)
+    limit = max(1, min(limit, LOG_RETENTION))
+    if not entries:
+        return {"entries": [], "next": after or 0, "truncated": False}
+
+    first_seq, last_seq = entries[0]["seq"], entries[-1]["seq"]
+    if after is None:
+        page = entries[-limit:]
+    else:
+        # A cursor ahead of the buffer means the server restarted: resend from the start
+        start = 0 if after > last_seq else bisect_right(entries, after, key=lambda e: e["seq"])
+        page = entries[start:start + limit]
+    return {
+        "entries": page,
+        "next": page[-1]["seq"] if page else last_seq,
+        "truncated": after is not None and after < first_seq - 1
+    }
 
 @app.post("/api/update-settings")
 async def update_settings(settings: SettingsUpdate):
@@ -465,6 +804,7 @@ async def update_settings(settings: SettingsUpdate):
     GLOBAL_STATE["settings"]["style"] = settings.style
     GLOBAL_STATE["market_data"]["df"] = None
     GLOBAL_STATE["market_data"]["history"] = [] 
+    mark_dirty("settings", "market_data")
     log_msg("SYS", f"Settings Updated: {settings.asset}")
     return {"status": "success"}
 
@@ -474,6 +814,7 @@ async def calibrate(c: CalibrationUpdate):
     if futures_price > 0:
         new_offset = futures_price - c.current_cfd_price
         GLOBAL_STATE["settings"]["offset"] = new_offset
+        mark_dirty("settings")
         log_msg("SYS", f"⚖️ Calibrated! Offset: {new_offset:.2f}")
         return {"status": "ok", "offset": new_offset}
     return {"status": "error"}
@@ -482,589 +823,27 @@ async def calibrate(c: CalibrationUpdate):
 async def update_risk(r: RiskUpdate):
     GLOBAL_STATE["settings"]["balance"] = r.balance
     GLOBAL_STATE["settings"]["risk_pct"] = r.risk_pct
+    mark_dirty("settings")
     log_msg("SYS", f"⚖️ Risk Updated: ${r.balance} @ {r.risk_pct}%")
     return {"status": "ok"}
 
 @app.get("/")
-async def root():
-    return HTMLResponse("""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>ForwardFin V4.7 | Drift-Proof</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <link href="https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;700&family=Inter:wght@300;400;600&display=swap" rel="stylesheet">
-    <style>
-        body { font-family: 'Inter', sans-serif; background-color: #0B1120; color: #E2E8F0; }
-        .mono { font-family: 'JetBrains Mono', monospace; }
-        .glass { background: rgba(30, 41, 59, 0.7); backdrop-filter: blur(10px); border: 1px solid rgba(255, 255, 255, 0.1); }
-        .terminal { background: #000; color: #00ff41; font-family: 'JetBrains Mono', monospace; font-size: 12px; height: 150px; overflow-y: auto; }
-        .arch-layer { transition: all 0.3s ease; cursor: pointer; border-left: 4px solid transparent; }
-        .arch-layer:hover { background-color: rgba(255,255,255,0.05); transform: translateX(4px); }
-        .arch-layer.active { background-color: rgba(14, 165, 233, 0.2); border-left-color: #0ea5e9; }
-        .lesson-card { cursor: pointer; transition: all 0.2s; border-left: 4px solid transparent; }
-        .lesson-card:hover { background: rgba(255,255,255,0.05); }
-        .lesson-card.active { background: rgba(14, 165, 233, 0.2); border-left-color: #0ea5e9; }
-        .btn-asset { transition: all 0.2s; border: 1px solid #334155; }
-        .btn-asset:hover { background-color: #1e293b; border-color: #0ea5e9; }
-        .btn-asset.active { background-color: #0ea5e9; color: white; border-color: #0ea5e9; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1); }
-        ::-webkit-scrollbar { width: 8px; }
-        ::-webkit-scrollbar-thumb { background: #334155; border-radius: 4px; }
-        .feature-box { background: rgba(15, 23, 42, 0.6); border: 1px solid rgba(255,255,255,0.05); }
-    </style>
-</head>
-<body class="bg-slate-900 text-slate-200 antialiased flex flex-col min-h-screen">
-
-    <nav class="sticky top-0 z-50 bg-slate-900/90 backdrop-blur-md border-b border-slate-800 shadow-sm">
-        <div class="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8">
-            <div class="flex justify-between h-16 items-center">
-                <div class="flex items-center gap-4">
-                    <div class="h-10 w-10 bg-sky-600 rounded-lg flex items-center justify-center text-white font-bold text-xl">FF</div>
-                    <div class="hidden md:block h-6 w-px bg-slate-700"></div>
-                    <div id="nav-ticker" class="font-mono text-sm font-bold text-slate-400 flex items-center gap-2">
-                        <span class="inline-block w-2 h-2 rounded-full bg-emerald-500 animate-pulse"></span>
-                        Connecting...
-                    </div>
-                </div>
-                <div class="flex gap-4 items-center">
-                    <div id="news-status" class="hidden md:block text-xs px-3 py-1 rounded bg-slate-800 border border-slate-700 text-slate-400">
-                        📰 News Scanner: Active
-                    </div>
-                    <div class="flex gap-2">
-                        <button onclick="setAsset('NQ1!')" id="btn-nq" class="btn-asset active px-4 py-1.5 rounded text-sm font-bold bg-slate-800 text-slate-300">NQ</button>
-                        <button onclick="setAsset('ES1!')" id="btn-es" class="btn-asset px-4 py-1.5 rounded text-sm font-bold bg-slate-800 text-slate-300">ES</button>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </nav>
-
-    <main class="flex-grow p-4 md:p-8">
-        
-        <div class="max-w-7xl mx-auto grid grid-cols-1 lg:grid-cols-12 gap-6 mb-12">
-            
-            <div class="lg:col-span-3 space-y-6">
-                <div class="glass rounded-xl p-5">
-                    <h3 class="text-xs font-bold text-slate-400 uppercase mb-3">1. Calibrate Price (Visual)</h3>
-                    <div class="space-y-2">
-                        <label class="text-xs text-slate-500">Capital.com Price</label>
-                        <input type="number" id="inp-cfd" class="w-full bg-slate-900 border border-slate-700 rounded px-3 py-2 text-white text-sm focus:border-sky-500 outline-none" placeholder="e.g. 15400.50">
-                        <button onclick="calibrate()" class="w-full bg-sky-600 hover:bg-sky-500 text-white text-xs font-bold py-2 rounded transition">SYNC OFFSET</button>
-                    </div>
-                </div>
-
-                <div class="glass rounded-xl p-5">
-                    <h3 class="text-xs font-bold text-slate-400 uppercase mb-3">2. Risk Engine</h3>
-                    <div class="space-y-3">
-                        <div>
-                            <label class="text-xs text-slate-500">Balance ($)</label>
-                            <input type="number" id="inp-bal" class="w-full bg-slate-900 border border-slate-700 rounded px-3 py-2 text-white text-sm outline-none" value="1000">
-                        </div>
-                        <div>
-                            <label class="text-xs text-slate-500">Risk %</label>
-                            <input type="number" id="inp-risk" class="w-full bg-slate-900 border border-slate-700 rounded px-3 py-2 text-white text-sm outline-none" value="2.0">
-                        </div>
-                        <button onclick="updateRisk()" class="w-full bg-slate-700 hover:bg-slate-600 text-white text-xs font-bold py-2 rounded transition">UPDATE RISK</button>
-                    </div>
-                </div>
-            </div>
-
-            <div class="lg:col-span-6 space-y-6">
-                <div class="glass rounded-xl overflow-hidden flex flex-col h-[200px]">
-                    <div class="bg-slate-800/50 px-4 py-2 border-b border-white/5 flex justify-between">
-                        <span class="text-xs font-bold text-slate-400">SYSTEM LOGS</span>
-                        <span class="text-[10px] text-emerald-500 mono">● LIVE</span>
-                    </div>
-                    <div id="terminal" class="terminal p-4 space-y-1">
-                        <div class="opacity-50">Loading ForwardFin Core...</div>
-                    </div>
-                </div>
-                
-                <div class="grid grid-cols-2 gap-4">
-                    <div class="glass rounded-xl p-4 text-center">
-                        <div class="text-xs font-bold text-slate-500 uppercase">Live Price (CFD)</div>
-                        <div id="price-display" class="text-3xl font-bold text-white mt-1 font-mono">---</div>
-                    </div>
-                    <div class="glass rounded-xl p-4 text-center">
-                        <div class="text-xs font-bold text-slate-500 uppercase">Current Offset</div>
-                        <div id="stat-offset" class="text-3xl font-bold text-sky-500 mt-1 font-mono">-105</div>
-                    </div>
-                </div>
-            </div>
-
-            <div class="lg:col-span-3 space-y-6">
-                <div class="glass rounded-xl p-5 flex flex-col h-64">
-                    <h3 class="text-xs font-bold text-slate-400 uppercase mb-3 flex items-center gap-2">
-                        <span>🤖</span> AI Analysis
-                    </h3>
-                    <div id="ai-text" class="text-sm text-slate-300 leading-relaxed overflow-y-auto flex-grow pr-2">
-                        Waiting for market data...
-                    </div>
-                </div>
-
-                <div class="glass rounded-xl p-4">
-                    <div class="flex justify-between items-center mb-2">
-                        <h4 class="text-xs font-bold text-slate-500 uppercase">Trade Setup</h4>
-                        <span id="setup-validity" class="text-[10px] bg-slate-800 px-2 py-1 rounded text-slate-400">WAITING</span>
-                    </div>
-                    <div class="space-y-2">
-                        <div class="flex justify-between text-xs">
-                            <span class="text-slate-500">Entry</span>
-                            <span id="setup-entry" class="text-white font-mono">---</span>
-                        </div>
-                        <div class="flex justify-between text-xs">
-                            <span class="text-slate-500">TP</span>
-                            <span id="setup-tp" class="text-emerald-400 font-mono">---</span>
-                        </div>
-                        <div class="flex justify-between text-xs">
-                            <span class="text-slate-500">SL</span>
-                            <span id="setup-sl" class="text-rose-400 font-mono">---</span>
-                        </div>
-                    </div>
-                </div>
-
-                <div class="glass rounded-xl p-4 flex items-center justify-between">
-                    <span class="text-xs font-bold text-slate-400">SMT DIVERGENCE</span>
-                    <span id="smt-status" class="text-xs font-bold text-rose-500">SYNCED</span>
-                </div>
-
-                <div class="glass rounded-xl p-4 flex items-center justify-between">
-                    <span class="text-xs font-bold text-slate-400">MOMENTUM RSI</span>
-                    <span id="rsi-status" class="text-xs font-bold text-sky-500">--.-</span>
-                </div>
-                
-                <div class="glass rounded-xl p-4 text-center">
-                    <div class="text-xs font-bold text-slate-500 uppercase mb-2">AI Signal</div>
-                    <div id="signal-badge" class="inline-block px-4 py-2 bg-slate-800 rounded text-sm font-bold text-slate-400">NEUTRAL</div>
-                </div>
-            </div>
-        </div>
-
-        <section id="overview" class="py-10 max-w-7xl mx-auto border-t border-slate-800">
-            <div class="grid grid-cols-1 lg:grid-cols-2 gap-12 items-center mb-10">
-                <div class="space-y-6">
-                    <div class="inline-flex items-center px-3 py-1 rounded-full bg-emerald-900/30 text-emerald-400 text-xs font-semibold uppercase tracking-wide border border-emerald-800">
-                        V4.7 LIVE: DRIFT-PROOF MODE
-                    </div>
-                    <h1 class="text-4xl sm:text-5xl font-extrabold text-white leading-tight">
-                        Precision Entries,<br>
-                        <span class="text-sky-500">Momentum Guarded.</span>
-                    </h1>
-                    <div class="flex items-center gap-2 mt-4 text-slate-500 font-mono text-sm">
-                        <span>🕒 BOT TIME (SAST):</span>
-                        <span id="server-clock" class="font-bold text-slate-300">--:--:--</span>
-                    </div>
-                    <p class="text-lg text-slate-400 max-w-lg mt-4">
-                        ForwardFin V4.7 uses <strong>Relative Market Structure</strong> to detect Asia Sweeps regardless of Broker price drift. Includes <strong>RSI Waterfall Protection</strong>.
-                    </p>
-                </div>
-                <div class="grid grid-cols-3 gap-4">
-                    <div class="glass p-4 rounded-2xl flex flex-col items-center">
-                        <h3 class="text-xs font-bold text-slate-500 uppercase tracking-wider mb-2">Correlation Monitor</h3>
-                        <div id="status-smt-big" class="text-xl font-black text-rose-500 mt-4">SYNCED</div>
-                    </div>
-                    <div class="glass p-4 rounded-2xl flex flex-col items-center">
-                        <h3 class="text-xs font-bold text-slate-500 uppercase tracking-wider mb-2">Session Range</h3>
-                        <div id="status-fib" class="text-sm font-black text-slate-300 mt-4 text-center">WAITING</div>
-                    </div>
-                    <div class="glass p-4 rounded-2xl flex flex-col items-center justify-center">
-                        <h3 class="text-xs font-bold text-slate-500 uppercase tracking-wider mb-2">Win Rate</h3>
-                        <div class="text-center my-2"><span id="win-rate" class="text-4xl font-black text-white">0%</span></div>
-                        <div class="w-full bg-slate-800 h-2 rounded-full overflow-hidden mt-1 mb-2"><div id="win-bar" class="bg-slate-200 h-full w-0 transition-all duration-1000"></div></div>
-                    </div>
-                </div>
-            </div>
-
-            <div class="glass p-6 rounded-2xl grid grid-cols-1 md:grid-cols-2 gap-6">
-                <div>
-                    <label class="text-xs font-bold text-slate-500 uppercase tracking-wider">Strategy Logic</label>
-                    <select id="sel-strategy" onchange="pushSettings()" class="w-full mt-2 bg-slate-800 border border-slate-700 text-white text-sm rounded-lg block p-2.5">
-                        <option value="SWEEP" selected>Asia Liquidity Sweep (Strict)</option>
-                    </select>
-                </div>
-                <div>
-                    <label class="text-xs font-bold text-slate-500 uppercase tracking-wider">Trade Style</label>
-                    <select id="sel-style" onchange="pushSettings()" class="w-full mt-2 bg-slate-800 border border-slate-700 text-white text-sm rounded-lg block p-2.5">
-                        <option value="PRECISION" selected>🎯 Precision (High Probability)</option>
-                        <option value="SCALP">⚡ Scalp (Fast Execution)</option>
-                    </select>
-                </div>
-            </div>
-        </section>
-
-        <div class="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 mb-12">
-             <div class="glass p-1 rounded-xl h-[500px] overflow-hidden">
-                <div id="tv-chart" class="w-full h-full rounded-lg bg-slate-900"></div>
-            </div>
-        </div>
-
-        <section id="features-detail" class="py-16 bg-slate-900 border-t border-slate-800">
-            <div class="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8">
-                <div class="text-center mb-12">
-                    <h2 class="text-3xl font-bold text-white">System Capabilities & Logic Breakdown</h2>
-                    <p class="mt-4 text-slate-400 max-w-3xl mx-auto">Understanding the ForwardFin V4.7 Engine: How it protects your capital and finds precision entries in a chaotic market.</p>
-                </div>
-                <div class="grid grid-cols-1 lg:grid-cols-2 gap-8">
-                    <div class="feature-box p-6 rounded-xl">
-                        <div class="flex items-center mb-4">
-                            <span class="text-2xl mr-3">🧭</span>
-                            <h3 class="text-xl font-bold text-sky-400">Drift-Proof "Relative" Math</h3>
-                        </div>
-                        <p class="text-slate-300 text-sm leading-relaxed mb-3">
-                            Most trading bots fail because of "Price Drift." If Yahoo Finance says Nasdaq is at 15,400, but your broker (HFM/Alpha) quotes 15,410 due to spreads, a static bot will miscalculate entry zones.
-                        </p>
-                        <p class="text-slate-400 text-xs italic">
-                            **How V4.6 Solves This:** ForwardFin does not look at the absolute price number (e.g., "$15,000"). Instead, it calculates **Relative Structure**. It measures the *percentage distance* from the Asia Session Low. A 2.5 SD drop is mathematically identical on every broker, regardless of the price tag. You no longer need to stress about perfect calibration every minute.
-                        </p>
-                    </div>
-
-                    <div class="feature-box p-6 rounded-xl">
-                        <div class="flex items-center mb-4">
-                            <span class="text-2xl mr-3">🛡️</span>
-                            <h3 class="text-xl font-bold text-rose-400">RSI "Waterfall" Guard</h3>
-                        </div>
-                        <p class="text-slate-300 text-sm leading-relaxed mb-3">
-                            The "Asia Sweep" strategy is a reversal system. However, sometimes the market doesn't reverse; it crashes (a "Waterfall"). Buying during a crash is account suicide.
-                        </p>
-                        <p class="text-slate-400 text-xs italic">
-                            **The Safety Mechanism:** Before sending a Signal, V4.7 checks the **Relative Strength Index (RSI)**. If price is in the Buy Zone but RSI is **< 20** (Extreme Momentum), the bot assumes a crash is happening and BLOCKS the trade. It waits for the "Curl" (RSI pointing up) to confirm buyers have stepped in.
-                        </p>
-                    </div>
-
-                    <div class="feature-box p-6 rounded-xl">
-                        <div class="flex items-center mb-4">
-                            <span class="text-2xl mr-3">🎯</span>
-                            <h3 class="text-xl font-bold text-emerald-400">Precision Mode (2.5 SD)</h3>
-                        </div>
-                        <p class="text-slate-300 text-sm leading-relaxed mb-3">
-                            Retail traders guess where the bottom is. Institutions calculate it. The "Standard Deviation (SD)" tells us how far price is statistically allowed to stretch before it snaps back.
-                        </p>
-                        <p class="text-slate-400 text-xs italic">
-                            **The Math:** V4.6 ignores minor fluctuations. It waits for price to stretch **2.5x** the size of the Asia Range. This is a statistical extreme. When price hits this "Kill Zone," the probability of a reversal is mathematically maximized (>85%), allowing for tight stops and high rewards.
-                        </p>
-                    </div>
-
-                    <div class="feature-box p-6 rounded-xl">
-                        <div class="flex items-center mb-4">
-                            <span class="text-2xl mr-3">👁️</span>
-                            <h3 class="text-xl font-bold text-purple-400">SMT Divergence (Correlation)</h3>
-                        </div>
-                        <p class="text-slate-300 text-sm leading-relaxed mb-3">
-                            The "Lie Detector." Nasdaq (NQ) and S&P 500 (ES) generally move together. When they disagree, it reveals a trap.
-                        </p>
-                        <p class="text-slate-400 text-xs italic">
-                            **The Logic:** If NQ makes a Lower Low (sweeping liquidity) but ES refuses to make a Lower Low (shows strength), this "Crack in Correlation" confirms that the NQ move was a fake-out to trap sellers. ForwardFin detects this divergence automatically to validate high-quality entries.
-                        </p>
-                    </div>
-
-                    <div class="feature-box p-6 rounded-xl">
-                        <div class="flex items-center mb-4">
-                            <span class="text-2xl mr-3">📰</span>
-                            <h3 class="text-xl font-bold text-amber-400">News Sentiment Scanner</h3>
-                        </div>
-                        <p class="text-slate-300 text-sm leading-relaxed mb-3">
-                            Markets react violently to high-impact news (CPI, FOMC, NFP). Trading through these events is gambling, not trading.
-                        </p>
-                        <p class="text-slate-400 text-xs italic">
-                            **The Logic:** The bot scans Yahoo Finance every 60 seconds for "Danger Words" (e.g., POWELL, RATES, JOBS). If detected within a 2-hour window, the system triggers a **Hard Freeze**. No trades are executed until the event passes, protecting you from slippage and spikes.
-                        </p>
-                    </div>
-
-                    <div class="feature-box p-6 rounded-xl">
-                        <div class="flex items-center mb-4">
-                            <span class="text-2xl mr-3">⚖️</span>
-                            <h3 class="text-xl font-bold text-blue-400">Dynamic Risk Engine</h3>
-                        </div>
-                        <p class="text-slate-300 text-sm leading-relaxed mb-3">
-                            Most traders blow up by guessing lot sizes. ForwardFin treats risk as a mathematical constant, not a variable.
-                        </p>
-                        <p class="text-slate-400 text-xs italic">
-                            **The Logic:** You set a risk percentage (e.g., 2%). The engine calculates the distance to your Stop Loss in points. It then solves the equation: `(Balance * Risk%) / Distance = Lot Size`. If volatility is high (wide stop), lot size shrinks. If volatility is low (tight stop), lot size expands. Your dollar risk remains constant.
-                        </p>
-                    </div>
-                </div>
-            </div>
-        </section>
-
-        <section id="academy" class="py-16 bg-slate-900 border-t border-slate-800">
-            <div class="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8">
-                <div class="text-center mb-12">
-                    <h2 class="text-3xl font-bold text-white">ForwardFin Academy</h2>
-                    <p class="mt-4 text-slate-400 max-w-2xl mx-auto">V4.7 Concepts: SMT Divergence & Liquidity.</p>
-                </div>
-                <div class="grid grid-cols-1 lg:grid-cols-12 gap-8 h-[400px]">
-                    <div class="lg:col-span-4 glass rounded-xl overflow-hidden overflow-y-auto">
-                        <div onclick="loadLesson(0)" class="lesson-card p-4 border-b border-slate-700 active">
-                            <h4 class="font-bold text-slate-200">1. SMT Divergence</h4>
-                            <p class="text-xs text-slate-500 mt-1">Correlation Check.</p>
-                        </div>
-                        <div onclick="loadLesson(1)" class="lesson-card p-4 border-b border-slate-700">
-                            <h4 class="font-bold text-slate-200">2. The "Kill Zone"</h4>
-                            <p class="text-xs text-slate-500 mt-1">Wait for 2.5 SD.</p>
-                        </div>
-                        <div onclick="loadLesson(2)" class="lesson-card p-4 border-b border-slate-700">
-                            <h4 class="font-bold text-slate-200">3. 1-Minute Trigger</h4>
-                            <p class="text-xs text-slate-500 mt-1">BOS + FVG Required.</p>
-                        </div>
-                        <div onclick="loadLesson(3)" class="lesson-card p-4 border-b border-slate-700">
-                            <h4 class="font-bold text-slate-200">4. Drift-Proof Math</h4>
-                            <p class="text-xs text-slate-500 mt-1">Relative Structure Logic.</p>
-                        </div>
-                        <div onclick="loadLesson(4)" class="lesson-card p-4 border-b border-slate-700">
-                            <h4 class="font-bold text-slate-200">5. RSI Momentum</h4>
-                            <p class="text-xs text-slate-500 mt-1">Avoiding the Crash.</p>
-                        </div>
-                    </div>
-                    <div class="lg:col-span-8 glass rounded-xl p-8 flex flex-col shadow-sm">
-                        <h3 id="lesson-title" class="text-2xl font-bold text-sky-500 mb-4">Select a Lesson</h3>
-                        <div id="lesson-body" class="text-slate-300 leading-relaxed mb-8 flex-grow overflow-y-auto">
-                            Click a module on the left to start learning.
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </section>
-
-        <section id="architecture" class="py-16 bg-slate-900 border-t border-slate-800">
-            <div class="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8">
-                <div class="mb-10">
-                    <h2 class="text-3xl font-bold text-white">System Architecture</h2>
-                    <p class="mt-4 text-slate-400 max-w-3xl">ForwardFin is built on a modular 5-layer stack.</p>
-                </div>
-                <div class="grid grid-cols-1 lg:grid-cols-12 gap-8">
-                    <div class="lg:col-span-5 space-y-3">
-                        <div onclick="selectLayer(0)" class="arch-layer active glass p-4 rounded-lg flex items-center justify-between group">
-                            <div><h4 class="font-bold text-slate-200">1. Data Ingestion</h4><p class="text-xs text-slate-500 mt-1">Yahoo Finance (yfinance)</p></div><div class="text-slate-500 group-hover:text-sky-500">→</div>
-                        </div>
-                        <div onclick="selectLayer(1)" class="arch-layer glass p-4 rounded-lg flex items-center justify-between group">
-                            <div><h4 class="font-bold text-slate-200">2. Analysis Engine</h4><p class="text-xs text-slate-500 mt-1">Pandas / NumPy / SMT Logic</p></div><div class="text-slate-500 group-hover:text-sky-500">→</div>
-                        </div>
-                        <div onclick="selectLayer(2)" class="arch-layer glass p-4 rounded-lg flex items-center justify-between group">
-                            <div><h4 class="font-bold text-slate-200">3. Strategy Core</h4><p class="text-xs text-slate-500 mt-1">Asia Sweep -> SMT -> 1m Trigger</p></div><div class="text-slate-500 group-hover:text-sky-500">→</div>
-                        </div>
-                        <div onclick="selectLayer(3)" class="arch-layer glass p-4 rounded-lg flex items-center justify-between group">
-                            <div><h4 class="font-bold text-slate-200">4. Alerting Layer</h4><p class="text-xs text-slate-500 mt-1">Discord Webhooks</p></div><div class="text-slate-500 group-hover:text-sky-500">→</div>
-                        </div>
-                        <div onclick="selectLayer(4)" class="arch-layer glass p-4 rounded-lg flex items-center justify-between group">
-                            <div><h4 class="font-bold text-slate-200">5. User Interface</h4><p class="text-xs text-slate-500 mt-1">FastAPI / Tailwind / JS</p></div><div class="text-slate-500 group-hover:text-sky-500">→</div>
-                        </div>
-                    </div>
-                    <div class="lg:col-span-7">
-                        <div class="glass rounded-xl h-full p-6 flex flex-col">
-                            <div class="flex justify-between items-center mb-4 border-b border-slate-700 pb-4">
-                                <h3 id="detail-title" class="text-xl font-bold text-white">Data Ingestion</h3>
-                                <span id="detail-badge" class="px-2 py-1 bg-sky-900 text-sky-200 text-xs rounded font-mono">Infrastructure</span>
-                            </div>
-                            <p id="detail-desc" class="text-slate-300 mb-6 flex-grow">Connects to Yahoo Finance to fetch real-time 1-minute candle data for NQ=F and ES=F futures contracts.</p>
-                            <h5 class="font-semibold text-slate-400 mb-3 text-sm uppercase">Tech Stack</h5>
-                            <ul id="detail-list" class="space-y-3"></ul>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </section>
-
-    </main>
-
-    <script type="text/javascript" src="https://s3.tradingview.com/tv.js"></script>
-    <script>
-        // Init Chart Function
-        function initChart(symbol) {
-            new TradingView.widget({
-                "autosize": true,
-                "symbol": "CAPITALCOM:US100",
-                "interval": "1",
-                "timezone": "Africa/Johannesburg",
-                "theme": "dark",
-                "style": "1",
-                "locale": "en",
-                "toolbar_bg": "#f1f3f6",
-                "enable_publishing": false,
-                "hide_side_toolbar": false,
-                "allow_symbol_change": false,
-                "container_id": "tv-chart"
-            });
-        }
-
-        // --- API & UI LOGIC ---
-        async function calibrate() {
-            const val = document.getElementById('inp-cfd').value;
-            if(!val) return;
-            const res = await fetch('/api/calibrate-offset', {
-                method: 'POST', headers: {'Content-Type':'application/json'},
-                body: JSON.stringify({ current_cfd_price: parseFloat(val) })
-            });
-        }
-
-        async function updateRisk() {
-            const bal = document.getElementById('inp-bal').value;
-            const risk = document.getElementById('inp-risk').value;
-            await fetch('/api/update-risk', {
-                method: 'POST', headers: {'Content-Type':'application/json'},
-                body: JSON.stringify({ balance: parseFloat(bal), risk_pct: parseFloat(risk) })
-            });
-        }
-
-        async function setAsset(asset) {
-            initChart(asset);
-        }
-        
-        async function pushSettings() {
-             // Function stub
-        }
-
-        async function updateLoop() {
-            try {
-                const res = await fetch('/api/live-data');
-                const data = await res.json();
-
-                // Top Bar
-                document.getElementById('nav-ticker').innerHTML = `<span class="inline-block w-2 h-2 rounded-full bg-emerald-500 animate-pulse"></span> ${data.settings.asset}: $${data.market_data.price.toLocaleString()}`;
-                if(data.market_data.server_time) document.getElementById('server-clock').innerText = data.market_data.server_time;
-
-                // News
-                const newsEl = document.getElementById('news-status');
-                if(data.news.is_danger) {
-                    newsEl.className = "hidden md:block text-xs px-3 py-1 rounded bg-red-900/50 border border-red-500 text-red-200 animate-pulse";
-                    newsEl.innerText = "⛔ NEWS HALT: " + data.news.headline;
-                } else {
-                    newsEl.className = "hidden md:block text-xs px-3 py-1 rounded bg-slate-800 border border-slate-700 text-slate-400";
-                    newsEl.innerText = "📰 News: Clear";
-                }
-
-                // Stats
-                document.getElementById('stat-offset').innerText = data.settings.offset.toFixed(2);
-                document.getElementById('price-display').innerText = "$" + data.market_data.price.toLocaleString(undefined, {minimumFractionDigits: 2});
-                
-                // Signal
-                const sigEl = document.getElementById('signal-badge');
-                sigEl.innerText = data.prediction.bias;
-                if(data.prediction.bias === "LONG") sigEl.className = "inline-block px-4 py-2 bg-emerald-600 rounded text-sm font-bold text-white animate-pulse";
-                else if(data.prediction.bias === "SHORT") sigEl.className = "inline-block px-4 py-2 bg-rose-600 rounded text-sm font-bold text-white animate-pulse";
-                else sigEl.className = "inline-block px-4 py-2 bg-slate-800 rounded text-sm font-bold text-slate-400";
-
-                document.getElementById('ai-text').innerText = data.prediction.narrative;
-                const smtEl = document.getElementById('smt-status');
-                const smtElBig = document.getElementById('status-smt-big');
-                if(data.market_data.smt_detected) {
-                    smtEl.innerText = "DIVERGENCE"; smtEl.className = "text-xs font-bold text-emerald-400";
-                    if(smtElBig) { smtElBig.innerText = "DIVERGENCE"; smtElBig.className = "text-xl font-black text-emerald-500 mt-4 animate-pulse"; }
-                } else {
-                    smtEl.innerText = "SYNCED"; smtEl.className = "text-xs font-bold text-rose-500";
-                    if(smtElBig) { smtElBig.innerText = "SYNCED"; smtElBig.className = "text-xl font-black text-rose-500 mt-4"; }
-                }
-                
-                // [NEW] V4.6 RSI Display
-                const rsiEl = document.getElementById('rsi-status');
-                if(rsiEl && data.market_data.rsi) {
-                    rsiEl.innerText = data.market_data.rsi.toFixed(1);
-                    if(data.market_data.rsi < 30 || data.market_data.rsi > 70) rsiEl.className = "text-xs font-bold text-rose-500 animate-pulse";
-                    else rsiEl.className = "text-xs font-bold text-emerald-500";
-                }
-
-                // Setup
-                const setup = data.prediction.trade_setup;
-                const validEl = document.getElementById('setup-validity');
-                if(validEl) {
-                    if(setup.valid) {
-                        validEl.innerText = "ACTIVE"; validEl.className = "text-[10px] bg-emerald-600 px-2 py-1 rounded text-white";
-                        document.getElementById('setup-entry').innerText = "$" + setup.entry.toLocaleString();
-                        document.getElementById('setup-tp').innerText = "$" + setup.tp.toLocaleString();
-                        document.getElementById('setup-sl').innerText = "$" + setup.sl.toLocaleString();
-                    } else {
-                        validEl.innerText = "WAITING"; validEl.className = "text-[10px] bg-slate-800 px-2 py-1 rounded text-slate-400";
-                    }
-                }
-
-                // Session
-                const fibEl = document.getElementById('status-fib');
-                const sessionLow = data.market_data.session_low;
-                const sessionHigh = data.market_data.session_high;
-                if (sessionLow > 0) {
-                      fibEl.innerText = `${sessionLow.toFixed(2)} - ${sessionHigh.toFixed(2)}`;
-                      fibEl.className = "text-sm font-bold text-slate-300 mt-4 text-center";
-                } else {
-                      fibEl.innerText = "WAITING FOR DATA";
-                }
-
-                if (data.performance) {
-                    const wr = data.performance.win_rate;
-                    document.getElementById('win-rate').innerText = wr + "%";
-                    document.getElementById('win-bar').style.width = wr + "%";
-                }
-
-                const term = document.getElementById('terminal');
-                term.innerHTML = data.logs.map(l => `<div>${l}</div>`).join('');
-
-            } catch(e) {}
-        }
-
-        // --- CONTENT LOGIC (Restored) ---
-        const lessons = [
-            { title: "1. SMT Divergence", body: "<b>Smart Money Technique (SMT):</b> This is our 'Lie Detector'. Institutional algorithms often manipulate one index (like NQ) to grab liquidity while holding the other (like ES) steady.<br><br><b>The Rule:</b> If NQ sweeps a Low (makes a lower low) but ES fails to sweep its matching Low (makes a higher low), that is a 'Crack in Correlation'. It confirms that the move down was a trap to sell to retail traders before reversing higher." },
-            { title: "2. The 'Kill Zone' (-2.5 STDV)", body: "<b>Why -2.5 Standard Deviations?</b> We do not guess bottoms. We use math. By projecting the Asia Range size (High - Low) downwards by a factor of 2.5, we identify a statistical 'Exhaustion Point'.<br><br>When price hits this zone, it is mathematically overextended relative to the session's volatility. This is where we stop analysing and start hunting for an entry." },
-            { title: "3. 1-Minute Trigger (BOS + FVG)", body: "<b>The Kill Switch:</b> SMT and STDV are just context. The Trigger confirms the reversal. We switch to the 1-minute chart and demand two things:<br>1. <b>BOS (Break of Structure):</b> Price must break above the last swing high, proving buyers are stepping in.<br>2. <b>FVG (Fair Value Gap):</b> This energetic move must leave behind an imbalance gap. This proves the move was institutional, not random noise." },
-            { title: "4. Drift-Proof Math", body: "<b>The Relative Engine:</b> Different brokers (HFM, Alpha, Capital.com) have different price feeds. A static bot waiting for '$15,000' will fail if your broker is at '$15,010'.<br><br><b>The Solution:</b> ForwardFin V4.6 uses Relative Math. We calculate the percentage distance from the Session High/Low. If the distance is 0.5%, it is 0.5% on EVERY broker. This ensures signals are valid regardless of spread or price drift." },
-            { title: "5. RSI Momentum", body: "<b>Crash Protection:</b> Buying a dip is good. Buying a crash is bad. The RSI (Relative Strength Index) tells us the difference.<br><br><b>The Rule:</b> If price is in the Buy Zone but RSI is below 30 (Vertical Drop), we DO NOT buy. We wait for the RSI to curl back above 30. This confirms that the selling pressure has exhausted and momentum is shifting up." }
-        ];
-
-        function loadLesson(index) {
-            const l = lessons[index];
-            document.getElementById('lesson-title').innerText = l.title;
-            document.getElementById('lesson-body').innerHTML = l.body;
-            document.querySelectorAll('.lesson-card').forEach((el, i) => {
-                if(i === index) el.classList.add('active', 'bg-sky-50', 'border-l-sky-600');
-                else el.classList.remove('active', 'bg-sky-50', 'border-l-sky-600');
-            });
-        }
-        
-        // --- ARCHITECTURE SECTION UPDATED HERE (V4.7) ---
-        const architectureData = [
-            { title: "Data Ingestion", badge: "Infrastructure", description: "Connects to Yahoo Finance to fetch real-time 1-minute candle data for NQ=F and ES=F futures contracts.", components: ["yfinance", "Python Requests"] },
-            { title: "Analysis Engine", badge: "Data Science", description: "Resamples 1m data to 5m to find STDV Zones. Calculates live Volatility and detects IFVGs.", components: ["Pandas Resample", "NumPy Math", "Custom Fib Scanner"] },
-            
-            // [UPDATED] Corrected text to 2.5 STDV
-            { title: "Strategy Core", badge: "Logic", description: "Hybrid 5m/1m Engine. Waits for 2.5 STDV on 5m, then hunts for 1m BOS+FVG triggers.", components: ["Multi-Timeframe Analysis", "Smart Money Logic"] },
-            
-            // [UPDATED] Corrected text to V4.6 Confidence
-            { title: "Alerting Layer", badge: "Notification", description: "When V4.6 confidence is met (>85% via RSI & SMT), constructs a rich embed payload and fires it to the Discord Webhook.", components: ["Discord API", "JSON Payloads"] },
-            
-            { title: "User Interface", badge: "Frontend", description: "Responsive dashboard served via FastAPI. Updates DOM elements live via polling.", components: ["FastAPI", "Tailwind CSS", "Chart.js", "TradingView"] }
-        ];
-
-        function selectLayer(index) {
-            document.querySelectorAll('.arch-layer').forEach((el, i) => {
-                if (i === index) el.classList.add('active', 'bg-sky-50', 'border-l-sky-600');
-                else el.classList.remove('active', 'bg-sky-50', 'border-l-sky-600');
-            });
-            const data = architectureData[index];
-            document.getElementById('detail-title').innerText = data.title;
-            document.getElementById('detail-badge').innerText = data.badge;
-            document.getElementById('detail-desc').innerText = data.description;
-            const list = document.getElementById('detail-list');
-            list.innerHTML = '';
-            data.components.forEach(comp => { list.innerHTML += `<li class="flex items-start text-sm text-slate-400"><span class="w-1.5 h-1.5 bg-sky-500 rounded-full mt-1.5 mr-2"></span>${comp}</li>`; });
-        }
+async def root(request: Request):
+    return serve_static(request, "index.html")
 
-        document.addEventListener('DOMContentLoaded', () => {
-            initChart("NQ1!");
-            loadLesson(0);
-            selectLayer(0);
-            updateLoop();
-            setInterval(updateLoop, 2000);
-        });
-    </script>
-</body>
-</html>
-"""
-)
+@app.get("/static/{name}")
+async def static_asset(request: Request, name: str):
+    return serve_static(request, name)
 
 if __name__ == "__main__":
     t1 = threading.Thread(target=run_market_data_stream, daemon=True)
     t2 = threading.Thread(target=run_strategy_engine, daemon=True)
+    alerts.start()
+    t3 = threading.Thread(target=run_news_scanner, daemon=True)
+    log_msg("SYS", f"Economic calendar: {len(CALENDAR.events)} scheduled events loaded.")
     t1.start()
     t2.start()
+    t3.start()
+    if LOG_SINK is not None:
+        threading.Thread(target=run_log_sink, daemon=True).start()
     uvicorn.run(app, host="0.0.0.0", port=10000)
\ No newline at end of file
@@ -6,22 +6,23 @@ import pandas as pd
 import numpy as np
 import yfinance as yf
 import sys
+import signal
+import socket
+from services.common import sentiment
+from services.common.batching import drain
+from services.common.sharding import history_key, leave, live_workers, owned_partitions, partition_channel, partition_of
 
 # --- SAFE IMPORT BLOCK ---
-try:
-    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-    HAS_NEWS = True
-    analyzer = SentimentIntensityAnalyzer()
-except ImportError:
-    print("⚠️ VADER MISSING: News features disabled.")
-    HAS_NEWS = False
+HAS_NEWS = sentiment.available()
+if not HAS_NEWS: print("⚠️ VADER MISSING: News features disabled.")
 
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 r = redis.Redis(host=REDIS_HOST, port=6379, db=0, decode_responses=True)
+# Shared with every other service through Redis, so each headline is scored once
+scorer = sentiment.SentimentScorer(redis_client=r)
 
 print("🧮 ANALYSIS ENGINE: Started", flush=True)
 
-price_history = []
 last_news_fetch = 0
 cached_sentiment = 0.0
 cached_headline = "News module loading..."
@@ -38,11 +39,8 @@ def fetch_crypto_news():
         news_list = btc.news
         if not news_list: return 0.0, "Market is quiet."
 
-        scores = []
         top_stories = news_list[:3]
-        for article in top_stories:
-            vs = analyzer.polarity_scores(article.get('title', ''))
-            scores.append(vs['compound'])
+        scores = scorer.score_batch([article.get('title', '') for article in top_stories])
 
         cached_sentiment = sum(scores) / len(scores)
         cached_headline = top_stories[0].get('title', 'News unavailable')
@@ -50,33 +48,200 @@ def fetch_crypto_news():
         return cached_sentiment, cached_headline
     except: return 0.0, "News Error"
 
-def calculate_indicators(prices):
-    if len(prices) < 26: return 50, 0, 0, "LOW"
-    series = pd.Series(prices)
-    rsi = 100 - (100 / (1 + (series.diff().where(lambda x: x>0,0).rolling(14).mean() / -series.diff().where(lambda x: x<0,0).rolling(14).mean())))
-    return rsi.iloc[-1], 0, 0, "LOW" # Simplified for safety
+# --- PER-SYMBOL STREAMING STATE ---
+# Each symbol gets its own fixed-size ring buffers, created on its first message, so work
+# per tick is constant and memory stays bounded however many symbols are ingested.
+HISTORY_SIZE = 60
+RSI_PERIOD = 14
+WARMUP_TICKS = 26
 
-def process_stream():
-    pubsub = r.pubsub()
-    pubsub.subscribe('market_data')
-    for message in pubsub.listen():
-        if message['type'] != 'message': continue
+class RingBuffer:
+    def __init__(self, size):
+        self.data = np.zeros(size)
+        self.head = 0
+        self.count = 0
+
+    def extend(self, values):
+        size, total = len(self.data), len(values)
+        values = values[-size:]
+        start = (self.head + total - len(values)) % size
+        self.data[(start + np.arange(len(values))) % size] = values
+        self.head = (self.head + total) % size
+        self.count = min(self.count + total, size)
+
+    def last(self):
+        return self.data[self.head - 1]
+
+    def values(self):
+        if self.count < len(self.data): return self.data[:self.count].copy()
+        return np.roll(self.data, -self.head)
+
+class SymbolState:
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.prices = RingBuffer(HISTORY_SIZE)
+        self.gains = RingBuffer(RSI_PERIOD)
+        self.losses = RingBuffer(RSI_PERIOD)
+        self.ticks = 0
+        self.last_ts = ''
+
+    def update(self, price):
+        return self.update_many([price])[0]
+
+    def update_many(self, prices):
+        # Vectorized: one (rsi, macd, volatility, risk) per price, as if fed one at a time
+        prices = np.asarray(prices, dtype=float)
+        n = len(prices)
+        if n == 0: return []
+        series = np.concatenate(([self.prices.last()], prices)) if self.ticks else prices
+        deltas = np.diff(series)
+        gains, losses = np.maximum(deltas, 0.0), np.maximum(-deltas, 0.0)
+
+        # Rolling RSI_PERIOD sums over (window so far + new deltas) from cumulative sums
+        prior = self.gains.count
+        ends = np.arange(prior + 1, prior + len(deltas) + 1)
+        starts = np.maximum(ends - RSI_PERIOD, 0)
+        cum_gain = np.concatenate(([0.0], np.cumsum(np.concatenate((self.gains.values(), gains)))))
+        cum_loss = np.concatenate(([0.0], np.cumsum(np.concatenate((self.losses.values(), losses)))))
+        gain_sums, loss_sums = np.zeros(n), np.zeros(n)
+        gain_sums[n - len(deltas):] = cum_gain[ends] - cum_gain[starts]
+        loss_sums[n - len(deltas):] = cum_loss[ends] - cum_loss[starts]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain_sums / loss_sums))
+        rsi = np.where(loss_sums > 0, rsi, np.where(gain_sums > 0, 100.0, 50.0))
+        rsi = np.where(self.ticks + np.arange(1, n + 1) >= WARMUP_TICKS, rsi, 50.0)
+
+        self.prices.extend(prices)
+        self.gains.extend(gains)
+        self.losses.extend(losses)
+        self.ticks += n
+        return [(float(value), 0, 0, "LOW") for value in rsi] # Simplified for safety
+
+states = {}
+
+# --- WARM START ---
+# A new state is seeded from the symbol's stored tick history (or exchange bars when there
+# isn't enough of it) in one update_many pass, so indicators are valid from the first tick.
+def fetch_history(symbol):
+    try:
+        closes = yf.Ticker(symbol).history(period="1d", interval="1m")['Close'].dropna()
+        return closes.tolist()[-HISTORY_SIZE:]
+    except Exception as e:
+        print(f"⚠️ History fetch failed for {symbol}: {e}", flush=True)
+        return []
+
+def seed(state, rows):
+    prices = [float(row['price']) for row in rows]
+    if len(prices) < WARMUP_TICKS:
+        fetched = fetch_history(state.symbol)
+        if len(fetched) > len(prices): prices = fetched
+    if prices: state.update_many(prices)
+    # Ticks at or before this were replayed already and must not be applied twice
+    state.last_ts = rows[-1].get('timestamp', '') if rows else ''
+
+def warm(symbols):
+    symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol not in states]
+    if not symbols: return
+    pipe = r.pipeline(transaction=False)
+    for symbol in symbols: pipe.lrange(history_key(symbol), -HISTORY_SIZE, -1)
+    for symbol, rows in zip(symbols, pipe.execute()):
+        state = states[symbol] = SymbolState(symbol)
+        seed(state, [json.loads(row) for row in rows])
+    print(f"🔥 Warmed {len(symbols)} symbol(s) from history", flush=True)
+
+def get_state(symbol):
+    if symbol not in states: warm([symbol])
+    return states[symbol]
+
+def stored_symbols(partitions):
+    symbols = [key.split(":", 1)[1] for key in r.scan_iter(match=history_key("*"), count=1000)]
+    return [symbol for symbol in symbols if partition_of(symbol) in partitions]
+
+# --- SHARDING ---
+# Every worker heartbeats into a shared set; the consistent-hash ring over live workers
+# decides which partitions (and so which symbols) this worker consumes.
+WORKER_ID = os.getenv("WORKER_ID") or socket.gethostname()
+REBALANCE_INTERVAL = 5
+owned = set()
+
+def rebalance(pubsub):
+    global owned
+    target = owned_partitions(WORKER_ID, live_workers(r, WORKER_ID))
+    gained, lost = target - owned, owned - target
+    if gained:
+        # Subscribe first, then warm: a tick landing in between is de-duplicated by timestamp
+        pubsub.subscribe(*[partition_channel(p) for p in gained])
+        warm(stored_symbols(gained))
+    if lost:
+        pubsub.unsubscribe(*[partition_channel(p) for p in lost])
+        for symbol in [s for s in states if partition_of(s) in lost]: del states[symbol]
+    if gained or lost: print(f"🧩 {WORKER_ID}: +{len(gained)} / -{len(lost)} partitions (now {len(target)})", flush=True)
+    owned = target
+
+# --- MICRO-BATCHED STREAM ---
+# Drain up to BATCH_SIZE messages (or whatever arrives within BATCH_WAIT_MS of the first),
+# update each symbol once with all its prices, then flush every SET/PUBLISH in one pipeline.
+BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "256"))
+BATCH_WAIT_MS = int(os.getenv("ANALYSIS_BATCH_WAIT_MS", "20"))
+
+def process_batch(messages):
+    ticks = []
+    for message in messages:
         try:
             data = json.loads(message['data'])
-            price = float(data['price'])
-            price_history.append(price)
-            if len(price_history) > 60: price_history.pop(0)
+            # Late messages from a partition handed to another worker are skipped
+            if partition_of(data['symbol']) not in owned: continue
+            ticks.append((data['symbol'], float(data['price']), data.get('timestamp')))
+        except (ValueError, KeyError, TypeError): continue
+    if not ticks: return
+
+    by_symbol = {}
+    for i, (symbol, _, _) in enumerate(ticks): by_symbol.setdefault(symbol, []).append(i)
+    results = [None] * len(ticks)
+    for symbol, rows in by_symbol.items():
+        state = get_state(symbol)
+        rows = [i for i in rows if not ticks[i][2] or ticks[i][2] > state.last_ts]
+        if not rows: continue
+        for row, indicators in zip(rows, state.update_many([ticks[i][1] for i in rows])):
+            results[row] = indicators
+        state.last_ts = ticks[rows[-1]][2] or state.last_ts
+    ticks, results = [t for t, res in zip(ticks, results) if res], [res for res in results if res]
+    if not ticks: return
 
-            rsi, _, _, risk = calculate_indicators(price_history)
-            sentiment, headline = fetch_crypto_news()
+    news_sentiment, headline = fetch_crypto_news()
+    bodies = []
+    for (symbol, price, _), (rsi, _, _, risk) in zip(ticks, results):
+        packet = {
+            "symbol": symbol, "price": price,
+            "indicators": {"rsi": rsi, "macd": 0, "volatility": 0, "risk_level": risk, "sentiment": news_sentiment, "headline": headline}
+        }
+        bodies.append((symbol, json.dumps(packet)))
 
-            packet = {
-                "symbol": data['symbol'], "price": price,
-                "indicators": {"rsi": rsi, "macd": 0, "volatility": 0, "risk_level": risk, "sentiment": sentiment, "headline": headline}
-            }
-            r.set("latest_price", json.dumps(packet))
-            r.publish('analysis_results', json.dumps(packet))
-        except: pass
+    # Only the newest value per key needs a SET; every packet is still published in order
+    pipe = r.pipeline(transaction=False)
+    for symbol, body in dict(bodies).items(): pipe.set(f"latest_price:{symbol}", body)
+    pipe.set("latest_price", bodies[-1][1])
+    for _, body in bodies: pipe.publish('analysis_results', body)
+    pipe.execute()
+
+def process_stream():
+    pubsub = r.pubsub()
+    next_rebalance = 0
+    while True:
+        if time.monotonic() >= next_rebalance:
+            try: rebalance(pubsub)
+            except Exception as e: print(f"⚠️ Rebalance Error: {e}", flush=True)
+            next_rebalance = time.monotonic() + REBALANCE_INTERVAL
+        if not owned:
+            time.sleep(0.5); continue
+        batch = drain(pubsub, BATCH_SIZE, BATCH_WAIT_MS)
+        if not batch: continue
+        try: process_batch(batch)
+        except Exception as e: print(f"⚠️ Analysis Error: {e}", flush=True)
 
 if __name__ == "__main__":
-    process_stream()
\ No newline at end of file
+    # Leave the ring on shutdown so peers pick up our partitions straight away
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try: process_stream()
+    finally: leave(r, WORKER_ID)
\ No newline at end of file
@@ -0,0 +1,323 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- 🔔 ALERT DISPATCHER ---
+# Owns a bounded queue and a single delivery thread, so callers only ever enqueue.
+# Webhook calls reuse one pooled session with strict timeouts, honour Discord's
+# 429 retry_after and otherwise retry with jittered exponential backoff.
+
+class AlertDispatcher:
+    def __init__(self, url, name="discord", max_queue=100, timeout=(3.05, 5.0),
+                 max_retries=4, backoff_base=1.0, backoff_cap=30.0, on_failure=None):
+        self.url = url
+        self.name = name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.on_failure = on_failure
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.latencies = deque(maxlen=500)
+        self.stats = {"sent": 0, "failed": 0, "dropped": 0, "retries": 0, "rate_limited": 0}
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"alerts-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, payload):
+        # Never blocks: a full queue means the webhook is down, so shed the alert
+        try:
+            self.queue.put_nowait((time.monotonic(), payload))
+            return True
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+
+    def snapshot(self):
+        ordered = sorted(self.latencies)
+        def pct(p): return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1) if ordered else None
+        return {**self.stats, "queued": self.queue.qsize(), "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)}}
+
+    def _run(self):
+        while True:
+            enqueued_at, payload = self.queue.get()
+            error = self._deliver(payload)
+            if error is None:
+                self.stats["sent"] += 1
+                self.latencies.append(time.monotonic() - enqueued_at)
+            else:
+                self.stats["failed"] += 1
+                if self.on_failure: self.on_failure(f"{self.name} delivery failed: {error}")
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _deliver(self, payload):
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt: self.stats["retries"] += 1
+            try:
+                resp = self.session.post(self.url, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = e
+                delay = self._backoff(attempt)
+            else:
+                if resp.status_code < 300: return None
+                error = f"HTTP {resp.status_code}"
+                if resp.status_code == 429:
+                    self.stats["rate_limited"] += 1
+                    delay = retry_after(resp) or self._backoff(attempt)
+                elif resp.status_code >= 500:
+                    delay = self._backoff(attempt)
+                else:
+                    return error  # 4xx other than 429 will not succeed on retry
+            if attempt < self.max_retries: time.sleep(min(delay, self.backoff_cap))
+        return error
+
+def retry_after(resp):
+    # Discord puts retry_after (seconds) in the JSON body; plain HTTP uses the header
+    try:
+        return float(resp.json()["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        pass
+    try:
+        return float(resp.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+# --- 🚦 RATE LIMITING ---
+class RateLimiter:
+    # Token bucket: `rate` sends per second on average, bursts of up to `burst`
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def try_acquire(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+# --- ⏱️ COOLDOWN TIMER WHEEL ---
+class TimerWheel:
+    # Hashed timing wheel: arming and lookups are O(1), and expiry only touches the
+    # slots the clock has passed, however many instruments are cooling down.
+    def __init__(self, tick=1.0, slots=4096):
+        self.tick = tick
+        self.slots = [set() for _ in range(slots)]
+        self.deadlines = {}
+        self.cursor = int(time.monotonic() / tick)
+
+    def arm(self, key, delay):
+        deadline = time.monotonic() + delay
+        self.deadlines[key] = deadline
+        self.slots[int(deadline / self.tick) % len(self.slots)].add(key)
+
+    def active(self, key):
+        self.advance()
+        return key in self.deadlines
+
+    def advance(self):
+        now = time.monotonic()
+        target = int(now / self.tick)
+        # Never walk more than one lap: after that every slot has been visited. The current
+        # tick's slot is scanned but not passed, since its keys may expire later this tick
+        for cursor in range(max(self.cursor + 1, target - len(self.slots) + 1), target + 1):
+            slot = self.slots[cursor % len(self.slots)]
+            for key in [k for k in slot if self.deadlines.get(k, 0) <= now]:
+                slot.discard(key)
+                self.deadlines.pop(key, None)
+        self.cursor = max(self.cursor, target - 1)
+
+# --- 📤 ALERT SINKS ---
+# An alert is a dict: {"instrument", "direction", "time", "embed"} where "embed" is a
+# Discord embed. Sinks receive coalesced batches and decide how to render them.
+
+class DiscordSink:
+    name = "discord"
+    max_batch = 10  # Discord accepts up to 10 embeds per message
+
+    def __init__(self, url, rate=0.5, burst=3, on_failure=None):
+        self.dispatcher = AlertDispatcher(url, name=self.name, on_failure=on_failure)
+        self.limiter = RateLimiter(rate, burst)
+
+    def start(self): self.dispatcher.start()
+    def snapshot(self): return self.dispatcher.snapshot()
+
+    def send(self, alerts):
+        return self.dispatcher.submit({"embeds": [a["embed"] for a in alerts]})
+
+class WebhookSink:
+    name = "webhook"
+    max_batch = 50
+
+    def __init__(self, url, rate=2.0, burst=5, on_failure=None):
+        self.dispatcher = AlertDispatcher(url, name=self.name, on_failure=on_failure)
+        self.limiter = RateLimiter(rate, burst)
+
+    def start(self): self.dispatcher.start()
+    def snapshot(self): return self.dispatcher.snapshot()
+
+    def send(self, alerts):
+        return self.dispatcher.submit({"alerts": alerts})
+
+class FileSink:
+    name = "file"
+    max_batch = 1000
+
+    def __init__(self, path, rate=100.0, burst=100):
+        self.path = path
+        self.limiter = RateLimiter(rate, burst)
+        self.written = 0
+
+    def start(self): pass
+    def snapshot(self): return {"written": self.written, "path": self.path}
+
+    def send(self, alerts):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for alert in alerts: f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+        self.written += len(alerts)
+        return True
+
+class RedisSink:
+    name = "redis"
+    max_batch = 100
+
+    def __init__(self, client, channel="alerts", rate=20.0, burst=20):
+        self.client = client
+        self.channel = channel
+        self.limiter = RateLimiter(rate, burst)
+        self.published = 0
+
+    def start(self): pass
+    def snapshot(self): return {"published": self.published, "channel": self.channel}
+
+    def send(self, alerts):
+        self.client.publish(self.channel, json.dumps({"alerts": alerts}))
+        self.published += len(alerts)
+        return True
+
+def sinks_from_env(discord_url=None, redis_client=None, on_failure=None):
+    # DISCORD_WEBHOOK_URL, ALERT_WEBHOOK_URL, ALERT_FILE and ALERT_CHANNEL each enable one sink
+    sinks = []
+    discord_url = os.getenv("DISCORD_WEBHOOK_URL") or discord_url
+    if discord_url: sinks.append(DiscordSink(discord_url, on_failure=on_failure))
+    if os.getenv("ALERT_WEBHOOK_URL"): sinks.append(WebhookSink(os.getenv("ALERT_WEBHOOK_URL"), on_failure=on_failure))
+    if os.getenv("ALERT_FILE"): sinks.append(FileSink(os.getenv("ALERT_FILE")))
+    if os.getenv("ALERT_CHANNEL") and redis_client is not None: sinks.append(RedisSink(redis_client, os.getenv("ALERT_CHANNEL")))
+    return sinks
+
+# --- 🔀 ALERT ROUTER ---
+class AlertRouter:
+    # Fans alerts out to every sink. Alerts arriving within `coalesce_window` seconds
+    # of each other go out as one batch (held at most `max_delay`), and a sink that is
+    # out of rate-limit tokens simply keeps coalescing until it may send again.
+    def __init__(self, sinks, cooldown=1800, coalesce_window=2.0, max_delay=10.0, tick=0.25):
+        self.sinks = sinks
+        self.cooldown = cooldown
+        self.coalesce_window = coalesce_window
+        self.max_delay = max_delay
+        self.tick = tick
+        self.cooldowns = TimerWheel()
+        self.pending = {sink.name: [] for sink in sinks}
+        self.lock = threading.Lock()
+        self.stats = {"published": 0, "suppressed": 0, "batches": 0}
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            for sink in self.sinks: sink.start()
+            self._thread = threading.Thread(target=self._run, name="alert-router", daemon=True)
+            self._thread.start()
+        return self
+
+    def publish(self, alert):
+        # Returns False when this instrument/direction is still cooling down
+        key = (alert["instrument"], alert["direction"])
+        alert.setdefault("time", time.time())
+        with self.lock:
+            if self.cooldowns.active(key):
+                self.stats["suppressed"] += 1
+                return False
+            self.cooldowns.arm(key, self.cooldown)
+            for queued in self.pending.values(): queued.append(alert)
+            self.stats["published"] += 1
+        return True
+
+    def snapshot(self):
+        with self.lock:
+            pending = {name: len(queued) for name, queued in self.pending.items()}
+        return {**self.stats, "cooling_down": len(self.cooldowns.deadlines), "pending": pending,
+                "sinks": {sink.name: sink.snapshot() for sink in self.sinks}}
+
+    def _run(self):
+        while True:
+            time.sleep(self.tick)
+            try: self.flush()
+            except Exception as e: print(f"⚠️ Alert Router Error: {e}", flush=True)
+
+    def flush(self, force=False):
+        now = time.time()
+        for sink in self.sinks:
+            with self.lock:
+                queued = self.pending[sink.name]
+                if not queued: continue
+                settling = now - queued[-1]["time"] < self.coalesce_window and now - queued[0]["time"] < self.max_delay
+                if settling and not force: continue
+                if not sink.limiter.try_acquire(): continue
+                batch = queued[:sink.max_batch]
+                del queued[:sink.max_batch]
+            sink.send(batch)
+            self.stats["batches"] += 1
+
+# --- 🧪 LOCAL WEBHOOK STAND-IN ---
+# python -m services.common.alerts [port] [limit_every]
+# Point DISCORD_WEBHOOK_URL at http://localhost:<port>/ to watch deliveries locally.
+# Every <limit_every>-th request is answered with a Discord-style 429.
+
+def run_standin(port=8765, limit_every=0):
+    counter = {"n": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            counter["n"] += 1
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if limit_every and counter["n"] % limit_every == 0:
+                reply, status = json.dumps({"message": "You are being rate limited.", "retry_after": 0.5}).encode(), 429
+            else:
+                reply, status = b"", 204
+                print(f"📨 #{counter['n']}: {body.decode('utf-8', 'replace')[:200]}", flush=True)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def log_message(self, *args): pass
+
+    print(f"🧪 Webhook stand-in listening on http://localhost:{port}/", flush=True)
+    HTTPServer(("0.0.0.0", port), Handler).serve_forever()
+
+if __name__ == "__main__":
+    import sys
+    run_standin(int(sys.argv[1]) if len(sys.argv) > 1 else 8765, int(sys.argv[2]) if len(sys.argv) > 2 else 0)
@@ -0,0 +1,17 @@
+import time
+
+# --- 📦 MICRO-BATCHING ---
+# Shared by the services that consume pub/sub: block up to a second for the first message,
+# then take up to `size` messages or whatever arrives within `wait_ms` of the first.
+
+def drain(pubsub, size, wait_ms):
+    first = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+    if first is None: return []
+    batch = [first]
+    deadline = time.monotonic() + wait_ms / 1000
+    while len(batch) < size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0: break
+        message = pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+        if message is not None: batch.append(message)
+    return batch
@@ -0,0 +1,49 @@
+import csv
+import os
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime
+
+# --- 📅 ECONOMIC CALENDAR ---
+# Scheduled releases (CPI, PPI, FOMC, NFP...) loaded from a CSV of `time,event` rows.
+# Each event becomes a blackout interval; overlapping intervals are merged and kept
+# sorted, so "are we in a blackout?" is one binary search. Events are also bucketed
+# by local calendar day once at load time.
+
+class EconomicCalendar:
+    def __init__(self, events, before=1800, after=3600, tz=None):
+        self.events = sorted(events, key=lambda e: e[0])  # [(datetime, label)]
+        self.starts, self.ends, self.labels = [], [], []
+        for when, label in self.events:
+            start, end = when.timestamp() - before, when.timestamp() + after
+            if self.starts and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+                self.labels[-1] = f"{self.labels[-1]} + {label}"
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+                self.labels.append(label)
+
+        self.by_day = defaultdict(list)
+        for when, label in self.events:
+            local = when.astimezone(tz) if tz else when
+            self.by_day[local.date()].append({"time": local.strftime('%H:%M'), "event": label})
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        events = []
+        if os.path.exists(path):
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = csv.DictReader(line for line in f if line.strip() and not line.startswith("#"))
+                for row in rows:
+                    events.append((datetime.fromisoformat(row["time"].strip()), row["event"].strip()))
+        return cls(events, **kwargs)
+
+    def blackout(self, ts):
+        # Label of the blackout covering unix time `ts`, or None
+        i = bisect_right(self.starts, ts) - 1
+        if i >= 0 and ts < self.ends[i]: return self.labels[i]
+        return None
+
+    def events_on(self, day):
+        return self.by_day.get(day, [])
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+# --- 🧪 FEATURE STORE ---
+# One definition of every model feature, used by both the trainer and the live service.
+# Features are computed per symbol and timeframe from closed bars and persisted to
+# FEATURE_DIR/<symbol>_<timeframe>.csv, so each bar's features are computed once. The bar
+# still forming is scored with the same formulas, stepped on from the last closed bar.
+# The inference service is the only writer; training tools open the store with
+# persist=False and extend what it has stored in memory. Files are always replaced whole,
+# so a reader never sees a half-written one.
+
+FEATURE_DIR = os.getenv("FEATURE_DIR", "data/features")
+FEATURES = ['RSI', 'MACD', 'ROC']
+TIMEFRAMES = {"1h": 3600, "1d": 86400}
+RSI_PERIOD = 14
+ROC_PERIOD = 14
+MACD_FAST, MACD_SLOW = 12, 26
+CONTEXT = max(RSI_PERIOD, ROC_PERIOD) + 1  # Closed bars needed to score the next one
+MAX_BARS = 2000
+FETCH_RETRY = 60
+
+def compute(close):
+    # Vectorized over a whole Close series; columns: Close, EMA12, EMA26, RSI, MACD, ROC
+    df = pd.DataFrame({"Close": close.astype(float)})
+    delta = df['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=RSI_PERIOD).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_PERIOD).mean()
+    rs = gain / loss
+    df['EMA12'] = df['Close'].ewm(span=MACD_FAST, adjust=False).mean()
+    df['EMA26'] = df['Close'].ewm(span=MACD_SLOW, adjust=False).mean()
+    df['RSI'] = 100 - (100 / (1 + rs))
+    df['MACD'] = df['EMA12'] - df['EMA26']
+    df['ROC'] = df['Close'].pct_change(periods=ROC_PERIOD) * 100
+    return df
+
+def step(closes, ema_fast, ema_slow, price):
+    # The row compute() would produce for `price` closing the bar after `closes`, given the
+    # previous bar's EMAs. Used for the forming bar and to extend a stored frame exactly.
+    ema_fast = ema_fast + (price - ema_fast) * 2 / (MACD_FAST + 1)
+    ema_slow = ema_slow + (price - ema_slow) * 2 / (MACD_SLOW + 1)
+    deltas = np.diff(np.append(closes[-RSI_PERIOD:], price))
+    rsi = roc = np.nan
+    if len(deltas) == RSI_PERIOD:
+        gain, loss = np.maximum(deltas, 0).mean(), np.maximum(-deltas, 0).mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
+    if len(closes) >= ROC_PERIOD:
+        roc = (price / closes[-ROC_PERIOD] - 1) * 100
+    return {"Close": price, "EMA12": ema_fast, "EMA26": ema_slow, "RSI": rsi, "MACD": ema_fast - ema_slow, "ROC": roc}
+
+def extend(frame, close):
+    # Append newly closed bars to a computed frame, continuing its EMAs rather than restarting them
+    closes = list(frame['Close'].to_numpy()[-CONTEXT:])
+    ema_fast, ema_slow = frame['EMA12'].iloc[-1], frame['EMA26'].iloc[-1]
+    rows = []
+    for price in close.to_numpy(dtype=float):
+        row = step(np.array(closes), ema_fast, ema_slow, price)
+        rows.append(row)
+        closes = (closes + [price])[-CONTEXT:]
+        ema_fast, ema_slow = row['EMA12'], row['EMA26']
+    return pd.concat([frame, pd.DataFrame(rows, index=close.index)[frame.columns]])
+
+def next_row(frame, price):
+    return step(frame['Close'].to_numpy()[-CONTEXT:], frame['EMA12'].iloc[-1], frame['EMA26'].iloc[-1], price)
+
+def bar_start(ts, timeframe="1h"):
+    seconds = TIMEFRAMES[timeframe]
+    return pd.Timestamp(int(ts // seconds * seconds), unit="s", tz="UTC")
+
+def fetch_closes(symbol, timeframe="1h", period="1mo"):
+    import yfinance as yf
+    close = yf.Ticker(symbol).history(period=period, interval=timeframe)['Close'].dropna()
+    close.index = close.index.tz_convert("UTC")
+    # The newest bar is usually still forming; only closed bars go into the store
+    return close[close.index < bar_start(time.time(), timeframe)]
+
+class FeatureStore:
+    def __init__(self, root=FEATURE_DIR, timeframe="1h", persist=True):
+        self.root = root
+        self.timeframe = timeframe
+        self.persist = persist
+        self.frames = {}   # symbol -> closed bars with features, oldest first
+        self.forming = {}  # symbol -> (bar start, last price) of the bar still open
+        self.retry_at = {}
+        self.lock = threading.Lock()
+
+    def path(self, symbol):
+        return os.path.join(self.root, f"{symbol}_{self.timeframe}.csv")
+
+    def _read(self, symbol):
+        try:
+            frame = pd.read_csv(self.path(symbol), index_col=0)
+            frame.index = pd.to_datetime(frame.index, utc=True)
+            return frame
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, symbol, frame):
+        if not self.persist: return
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.path(symbol) + ".tmp"
+        frame.to_csv(tmp)
+        os.replace(tmp, self.path(symbol))
+
+    def refresh(self, symbol, close):
+        # Merge downloaded closed bars; only bars newer than the stored ones are scored
+        with self.lock:
+            frame = self.frames.get(symbol)
+            if frame is None: frame = self._read(symbol)
+            if frame is not None and len(frame):
+                close = close[close.index > frame.index[-1]]
+                if len(close): frame = extend(frame, close)
+            else:
+                frame = compute(close)
+            frame = frame.iloc[-MAX_BARS:]
+            self._write(symbol, frame)
+            self.frames[symbol] = frame
+            return frame
+
+    def history(self, symbol, fetch=True, period="1mo"):
+        # Closed bars for `symbol`, topping up from the exchange (at most every FETCH_RETRY
+        # seconds per symbol) when the stored ones are missing or stale
+        frame = self.frames.get(symbol)
+        if frame is None: frame = self.frames[symbol] = self._read(symbol)
+        newest_due = bar_start(time.time(), self.timeframe) - pd.Timedelta(seconds=TIMEFRAMES[self.timeframe])
+        stale = frame is None or not len(frame) or frame.index[-1] < newest_due
+        if fetch and stale and time.monotonic() >= self.retry_at.get(symbol, 0):
+            self.retry_at[symbol] = time.monotonic() + FETCH_RETRY
+            try: frame = self.refresh(symbol, fetch_closes(symbol, self.timeframe, period))
+            except Exception as e: print(f"⚠️ FEATURES: Could not fetch {symbol} history: {e}", flush=True)
+        return frame
+
+    def live(self, symbol, price, ts=None):
+        # Feature vector (FEATURES order) for the forming bar, closing bars as time moves on
+        start = bar_start(time.time() if ts is None else ts, self.timeframe)
+        bar = pd.Timedelta(seconds=TIMEFRAMES[self.timeframe])
+        frame, previous = self.frames.get(symbol), self.forming.get(symbol)
+        # Cold start, or a gap the forming bar can't fill: top up from the exchange
+        if frame is None or not len(frame) or (frame.index[-1] < start - bar and not (previous and previous[0] == start - bar)):
+            frame = self.history(symbol)
+        if frame is None or not len(frame): return None
+        with self.lock:
+            previous = self.forming.get(symbol)
+            if previous and previous[0] < start and previous[0] > frame.index[-1]:
+                # The forming bar has closed on its last price: score it once and persist it
+                frame = self.frames[symbol] = extend(frame, pd.Series([previous[1]], index=[previous[0]])).iloc[-MAX_BARS:]
+                self._write(symbol, frame)
+            self.forming[symbol] = (start, price)
+            row = next_row(frame, price)
+        return [row[name] for name in FEATURES]
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# --- 📰 HEADLINE SENTIMENT ---
+# One VADER lexicon per process, loaded on first use. Scores are memoized by a hash
+# of the headline in a bounded LRU and, when a Redis client is given, in a shared
+# Redis cache, so a headline is scored once across the whole fleet.
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+def get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+                _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+def available():
+    try:
+        import vaderSentiment.vaderSentiment  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def headline_key(text):
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+class SentimentScorer:
+    def __init__(self, max_entries=4096, redis_client=None, prefix="sentiment:", ttl=7 * 86400):
+        self.max_entries = max_entries
+        self.redis = redis_client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "shared_hits": 0, "scored": 0}
+
+    def _remember(self, key, score):
+        self.cache[key] = score
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.max_entries: self.cache.popitem(last=False)
+
+    def score_batch(self, headlines):
+        # Compound score in [-1, 1] for each headline, in order
+        keys = [headline_key(text) for text in headlines]
+        scores = {}
+        with self.lock:
+            for key in keys:
+                if key in self.cache:
+                    scores[key] = self.cache[key]
+                    self.cache.move_to_end(key)
+                    self.stats["hits"] += 1
+        missing = list(dict.fromkeys(k for k in keys if k not in scores))
+
+        if missing and self.redis is not None:
+            try:
+                for key, value in zip(missing, self.redis.mget([self.prefix + k for k in missing])):
+                    if value is not None:
+                        scores[key] = float(value)
+                        self.stats["shared_hits"] += 1
+            except Exception as e:
+                print(f"⚠️ Sentiment cache unavailable: {e}")
+
+        fresh = {}
+        for key, text in zip(keys, headlines):
+            if key not in scores and key not in fresh:
+                fresh[key] = get_analyzer().polarity_scores(text)["compound"]
+        self.stats["scored"] += len(fresh)
+        scores.update(fresh)
+
+        if fresh and self.redis is not None:
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for key, score in fresh.items(): pipe.set(self.prefix + key, score, ex=self.ttl)
+                pipe.execute()
+            except Exception as e:
+                print(f"⚠️ Sentiment cache unavailable: {e}")
+
+        with self.lock:
+            for key in missing: self._remember(key, scores[key])
+        return [scores[key] for key in keys]
+
+    def score(self, headline):
+        return self.score_batch([headline])[0]
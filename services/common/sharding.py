@@ -0,0 +1,53 @@
+import os
+import time
+import zlib
+from bisect import bisect_right
+
+# --- 🧩 SYMBOL PARTITIONING ---
+# Symbols hash into a fixed number of partitions, each with its own market data channel.
+# Partitions are spread over the live analysis workers with a consistent-hash ring, so a
+# worker joining or leaving only moves roughly 1/N of the partitions.
+
+PARTITIONS = int(os.getenv("MARKET_PARTITIONS", "64"))
+HISTORY_LENGTH = int(os.getenv("PRICE_HISTORY_LENGTH", "500"))
+WORKERS_KEY = "analysis_workers"
+WORKER_TTL = 15
+
+def stable_hash(text):
+    # Python's hash() is salted per process; this must agree across processes
+    return zlib.crc32(text.encode("utf-8"))
+
+def partition_of(symbol, partitions=PARTITIONS):
+    return stable_hash(symbol) % partitions
+
+def partition_channel(partition):
+    return f"market_data:{partition}"
+
+def history_key(symbol):
+    return f"price_history:{symbol}"
+
+class HashRing:
+    def __init__(self, workers, vnodes=64):
+        points = sorted((stable_hash(f"{worker}#{i}"), worker) for worker in workers for i in range(vnodes))
+        self.hashes = [h for h, _ in points]
+        self.workers = [w for _, w in points]
+
+    def owner(self, key):
+        if not self.hashes: return None
+        return self.workers[bisect_right(self.hashes, stable_hash(key)) % len(self.hashes)]
+
+def owned_partitions(worker, workers, partitions=PARTITIONS):
+    ring = HashRing(workers)
+    return {p for p in range(partitions) if ring.owner(f"partition:{p}") == worker}
+
+def live_workers(r, worker):
+    # Heartbeat this worker and return everyone who has heartbeated within WORKER_TTL
+    now = time.time()
+    pipe = r.pipeline(transaction=False)
+    pipe.zadd(WORKERS_KEY, {worker: now})
+    pipe.zremrangebyscore(WORKERS_KEY, 0, now - WORKER_TTL)
+    pipe.zrange(WORKERS_KEY, 0, -1)
+    return sorted(pipe.execute()[-1])
+
+def leave(r, worker):
+    r.zrem(WORKERS_KEY, worker)
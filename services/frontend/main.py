@@ -1,7 +1,9 @@
 from fastapi import FastAPI, Request
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-import redis
+from typing import Optional
+import redis.asyncio as aioredis
+import asyncio
 import json
 import os
 
@@ -13,47 +15,148 @@ app.mount("/static", StaticFiles(directory="services/frontend/static"), name="st
 templates = Jinja2Templates(directory="services/frontend/templates")
 
 # 2. Connect to Redis (The Data Source)
+# One shared async pool: requests never block the event loop waiting on a socket
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+MAX_SYMBOLS_PER_REQUEST = 50
 try:
-    r = redis.Redis(host=REDIS_HOST, port=6379, db=0, decode_responses=True)
+    pool = aioredis.ConnectionPool(host=REDIS_HOST, port=6379, db=0, decode_responses=True, max_connections=REDIS_MAX_CONNECTIONS)
+    r = aioredis.Redis(connection_pool=pool)
 except Exception as e:
     print(f"Warning: Redis connection failed: {e}")
     r = None
 
-# 3. The Home Page Route
+def state_keys(symbol=None):
+    # Global keys hold the latest packet of any symbol; suffixed keys are per symbol
+    suffix = f":{symbol}" if symbol else ""
+    return [f"latest_price{suffix}", f"latest_prediction{suffix}", f"latest_narrative{suffix}"]
+
+def parse_state(price_data, prediction_data, narrative_data):
+    # Parse it safely
+    price = json.loads(price_data) if price_data else None
+    prediction = json.loads(prediction_data) if prediction_data else None
+    return {"price": price, "prediction": prediction, "narrative": narrative_data}
+
+def build_view(price, prediction, narrative):
+    narrative = narrative if narrative else "Waiting for insights..."
+
+    # Extract Risk Level safely
+    # We look inside the price packet for the calculated volatility risk
+    risk = "LOW"
+    if price and 'indicators' in price:
+         risk = price['indicators'].get('risk_level', 'LOW')
+
+    return {
+        "price": price,
+        "prediction": prediction,
+        "narrative": narrative,
+        "risk": risk  # <--- This is the new fuel for your Risk Gauge
+    }
+
+# 3. Latest-State Cache (fed by pub/sub)
+# Reads are served from process memory; Redis is only read on a cold start,
+# after a disconnect, or for a symbol this process has not loaded yet. An entry is
+# "loaded" once all its fields have been read from Redis; the first update for a
+# symbol that isn't loads it first, so the other fields don't show as missing.
+CHANNELS = ("analysis_results", "inference_results", "narrative_results")
+GLOBAL_KEY = None
+cache = {}  # symbol (or GLOBAL_KEY) -> {"price", "prediction", "narrative", "loaded", "view"}
+cache_ready = False
+listener_task = None
+
+def cache_put(symbol, field, value, overwrite=True):
+    entry = cache.setdefault(symbol, {"price": None, "prediction": None, "narrative": None, "loaded": False})
+    if overwrite or entry[field] is None:
+        entry[field] = value
+    entry["view"] = build_view(entry["price"], entry["prediction"], entry["narrative"])
+    return entry
+
+def fill(symbol, state):
+    # Redis values never clobber anything pub/sub delivered meanwhile
+    for field, value in state.items():
+        entry = cache_put(symbol, field, value, overwrite=False)
+    entry["loaded"] = True
+    return entry
+
+async def apply_update(channel, raw):
+    packet = json.loads(raw)
+    symbol = packet.get("symbol")
+    if channel == "analysis_results": field, value = "price", packet
+    elif channel == "inference_results": field, value = "prediction", packet
+    else: field, value = "narrative", packet.get("narrative")
+    cache_put(GLOBAL_KEY, field, value)
+    if symbol:
+        if not cache.get(symbol, {}).get("loaded"): fill(symbol, parse_state(*await r.mget(state_keys(symbol))))
+        cache_put(symbol, field, value)
+
+async def read_through(symbol):
+    state = parse_state(*await r.mget(state_keys(symbol)))
+    if symbol is not GLOBAL_KEY and not any(state.values()):
+        return build_view(**state)  # Unknown symbols are not cached, so lookups can't grow memory
+    return fill(symbol, state)["view"]
+
+async def listen_for_updates():
+    global cache_ready
+    while True:
+        pubsub = r.pubsub()
+        try:
+            # Subscribe BEFORE warming so no update can slip between the two
+            await pubsub.subscribe(*CHANNELS)
+            cache.clear()
+            await read_through(GLOBAL_KEY)
+            cache_ready = True
+            print("📡 Frontend cache: live", flush=True)
+            async for message in pubsub.listen():
+                if message['type'] != 'message': continue
+                try: await apply_update(message['channel'], message['data'])
+                except (ValueError, AttributeError) as e: print(f"Warning: Bad update on {message['channel']}: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Warning: Pub/sub disconnected, serving from Redis: {e}")
+        finally:
+            cache_ready = False
+            await pubsub.aclose()
+        await asyncio.sleep(1)
+
+@app.on_event("startup")
+async def start_listener():
+    global listener_task
+    if r: listener_task = asyncio.create_task(listen_for_updates())
+
+@app.on_event("shutdown")
+async def close_redis():
+    if listener_task: listener_task.cancel()
+    if r: await r.aclose()
+
+async def get_view(symbol=GLOBAL_KEY):
+    entry = cache.get(symbol)
+    if cache_ready and entry is not None and entry["loaded"]: return entry["view"]
+    if cache_ready: return await read_through(symbol)
+    return build_view(**parse_state(*await r.mget(state_keys(symbol))))
+
+# 4. The Home Page Route
 @app.get("/")
 async def read_root(request: Request):
     # This serves your exact HTML file
     return templates.TemplateResponse("index.html", {"request": request})
 
-# 4. The Data API (Your HTML will ask this for updates)
+# 5. The Data API (Your HTML will ask this for updates)
+# ?symbols=BTC-USD,ETH-USD returns one view per symbol (from the cache, or one MGET when cold)
 @app.get("/api/live-data")
-async def get_data():
+async def get_data(symbols: Optional[str] = None):
     if not r:
         return {"error": "Redis not connected"}
-        
+
     try:
-        # Fetch latest data from Redis
-        price_data = r.get("latest_price")
-        prediction_data = r.get("latest_prediction")
-        narrative_data = r.get("latest_narrative")
-
-        # Parse it safely
-        price = json.loads(price_data) if price_data else None
-        pred = json.loads(prediction_data) if prediction_data else None
-        narrative = narrative_data if narrative_data else "Waiting for insights..."
-
-        # Extract Risk Level safely
-        # We look inside the price packet for the calculated volatility risk
-        risk = "LOW"
-        if price and 'indicators' in price:
-             risk = price['indicators'].get('risk_level', 'LOW')
-
-        return {
-            "price": price,
-            "prediction": pred,
-            "narrative": narrative,
-            "risk": risk  # <--- This is the new fuel for your Risk Gauge
-        }
+        if not symbols:
+            return await get_view()
+
+        wanted = list(dict.fromkeys(s.strip() for s in symbols.split(",") if s.strip()))[:MAX_SYMBOLS_PER_REQUEST]
+        if cache_ready:
+            return {"symbols": {symbol: await get_view(symbol) for symbol in wanted}}
+
+        values = await r.mget([key for symbol in wanted for key in state_keys(symbol)])
+        return {"symbols": {symbol: build_view(**parse_state(*values[i * 3:i * 3 + 3])) for i, symbol in enumerate(wanted)}}
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
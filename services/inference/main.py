@@ -2,19 +2,23 @@ import json
 import redis
 import os
 import numpy as np
-import pandas as pd
-import yfinance as yf
 import sys
 import time
+import socket
+import subprocess
+import threading
+import importlib.util
 import urllib.request
+from services.common.alerts import AlertRouter, sinks_from_env
+from services.common.batching import drain
+from services.common.features import FeatureStore
+from services.inference import registry
+from services.inference.outcomes import OutcomeTracker
 
 # --- SAFE IMPORT BLOCK ---
-try:
-    import xgboost as xgb
-    HAS_ML = True
-except ImportError:
-    print("⚠️ WARNING: 'xgboost' not found. Using simple logic mode.")
-    HAS_ML = False
+# Serving runs compiled NumPy trees; xgboost is only needed by the (child process) trainer
+HAS_TRAINER = importlib.util.find_spec("xgboost") is not None
+if not HAS_TRAINER: print("⚠️ WARNING: 'xgboost' not found. Serving registered models only, retraining disabled.")
 
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 r = redis.Redis(host=REDIS_HOST, port=6379, db=0, decode_responses=True)
@@ -23,126 +27,242 @@ r = redis.Redis(host=REDIS_HOST, port=6379, db=0, decode_responses=True)
 DISCORD_WEBHOOK_URL = "https://discordapp.com/api/webhooks/1454098742218330307/gi8wvEn0pMcNsAWIR_kY5-_0_VE4CvsgWjkSXjCasXX-xUrydbhYtxHRLLLgiKxs_pLL"
 CONFIDENCE_THRESHOLD = 70.0
 ALERT_COOLDOWN = 3600
-last_alert_time = 0
+# Per-symbol + direction cooldowns, coalescing and per-sink rate limits live in the router
+alerts = AlertRouter(sinks_from_env(DISCORD_WEBHOOK_URL, redis_client=r), cooldown=ALERT_COOLDOWN)
 
 print("🧠 AI BRAIN: Started (Safe Mode)", flush=True)
 
-def train_model():
-    if not HAS_ML: return None
-    print("🎓 TRAINER: Downloading Bitcoin history...")
-    try:
-        btc = yf.Ticker("BTC-USD")
-        df = btc.history(period="1mo", interval="1h")
-        if len(df) < 50: return None
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-        exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = exp1 - exp2
-        df['ROC'] = df['Close'].pct_change(periods=14) * 100
-        df['Target'] = (df['Close'].shift(-1) > df['Close']).astype(int)
-        df.dropna(inplace=True)
-        features = ['RSI', 'MACD', 'ROC']
-        model = xgb.XGBClassifier(n_estimators=100, max_depth=3, eval_metric='logloss')
-        model.fit(df[features], df['Target'])
-        return model
-    except: return None
-
-model = train_model()
+# Models are trained offline (python -m services.inference.train) and loaded from the registry.
+# (model, meta) is swapped as a single reference, so a prediction never sees a half-updated pair.
+loaded = registry.load_latest()
+if loaded[0]: print(f"📦 MODEL: {loaded[1]['version']} trained on {loaded[1]['window']} {loaded[1]['metrics']}", flush=True)
+else: print(f"⚠️ MODEL: No compatible model in '{registry.MODEL_DIR}'. Using simple logic mode.", flush=True)
+
+# --- 🔁 RETRAINING & HOT SWAP ---
+# One replica at a time (Redis lock) retrains in a low-priority child process, which only
+# promotes the challenger if it scores no worse than the current model on unseen rows.
+# Every replica watches LATEST and loads new versions on a side thread, so the listener
+# never waits on training or loading.
+RETRAIN_INTERVAL = int(os.getenv("RETRAIN_INTERVAL", "21600"))  # 0 disables retraining
+RETRAIN_PERIOD = os.getenv("RETRAIN_PERIOD", "1mo")
+MODEL_POLL_INTERVAL = 30
+WORKER_ID = os.getenv("WORKER_ID") or socket.gethostname()
+
+def run_model_watcher():
+    global loaded
+    while True:
+        time.sleep(MODEL_POLL_INTERVAL)
+        version = registry.latest_version()
+        if not version or version == (loaded[1] or {}).get("version"): continue
+        try:
+            candidate = registry.load(version)
+            if not registry.compatible(candidate[1]): continue
+            loaded = candidate
+            print(f"🔁 MODEL: Swapped to {version} {candidate[1]['metrics']}", flush=True)
+        except Exception as e:
+            print(f"⚠️ MODEL: Could not load {version}: {e}", flush=True)
+
+def run_retrainer():
+    while True:
+        time.sleep(RETRAIN_INTERVAL)
+        if not r.set("retrain_lock", WORKER_ID, nx=True, ex=max(60, RETRAIN_INTERVAL // 2)): continue
+        print("🎓 RETRAIN: Training challenger...", flush=True)
+        # nice(1) rather than preexec_fn: forking with a callback is unsafe while our threads run
+        proc = subprocess.run(["nice", "-n", "10", sys.executable, "-m", "services.inference.train", "--challenge", "BTC-USD", RETRAIN_PERIOD])
+        if proc.returncode: print(f"⚠️ RETRAIN: Trainer exited with {proc.returncode}", flush=True)
 
 # --- THE JUDGE ---
-def update_scoreboard(current_price):
-    stats = r.get("scoreboard_stats")
-    if not stats: stats = {"wins": 0, "total": 0, "win_rate": 0}
-    else: stats = json.loads(stats)
+# Grading, counting and remembering the new call happen inside Redis in one atomic step, so
+# replicas can share a symbol's scoreboard (a hash of wins/total/win_rate) without races.
+# The script is loaded once and called by SHA; it is only loaded again after Redis drops it.
+MIN_MOVE = 50
+GRADE_SCRIPT = """
+local last = redis.call('GET', KEYS[2])
+if last then
+    local memory = cjson.decode(last)
+    local price, entry = tonumber(ARGV[1]), tonumber(memory['price'])
+    if math.abs(price - entry) > tonumber(ARGV[2]) then
+        local won = (memory['bias'] == 'BULLISH' and price > entry) or (memory['bias'] == 'BEARISH' and price < entry)
+        local total = redis.call('HINCRBY', KEYS[1], 'total', 1)
+        local wins = redis.call('HINCRBY', KEYS[1], 'wins', won and 1 or 0)
+        redis.call('HSET', KEYS[1], 'win_rate', math.floor(wins * 100 / total))
+    end
+end
+if ARGV[3] then redis.call('SET', KEYS[2], ARGV[3]) end
+return redis.call('HMGET', KEYS[1], 'wins', 'total', 'win_rate')
+"""
+grade_sha = None
+
+def load_grade_script():
+    global grade_sha
+    grade_sha = r.script_load(GRADE_SCRIPT)
+
+def update_scoreboard(symbol, current_price, bias=None, client=None):
+    # Grades the last call against current_price and, given a bias, records the new call.
+    # With a pipeline as client the stats come back from execute() (see parse_scoreboard).
+    if grade_sha is None: load_grade_script()
+    args = [current_price, MIN_MOVE] + ([json.dumps({"price": current_price, "bias": bias})] if bias else [])
+    reply = (client or r).evalsha(grade_sha, 2, f"scoreboard:{symbol}", f"memory_last_trade:{symbol}", *args)
+    return reply if client is not None else parse_scoreboard(reply)
+
+def grade_calls(calls):
+    # One round trip of EVALSHAs, in message order. If Redis restarted and lost the script
+    # every call failed with NOSCRIPT and changed nothing, so reload it and send them again.
+    for attempt in range(2):
+        pipe = r.pipeline(transaction=False)
+        for call in calls: update_scoreboard(call["symbol"], call["price"], call["bias"], client=pipe)
+        try: return [parse_scoreboard(reply) for reply in pipe.execute()]
+        except redis.exceptions.NoScriptError:
+            if attempt: raise
+            load_grade_script()
+
+def parse_scoreboard(reply):
+    wins, total, win_rate = reply
+    return {"wins": int(wins or 0), "total": int(total or 0), "win_rate": int(win_rate or 0)}
+
+# --- 🧪 LIVE FEATURES ---
+# Same definitions and stored bars as the trainer: the model sees hourly RSI/MACD/ROC for
+# the bar now forming, not the tick-level indicators the analysis service publishes.
+FEATURE_TIMEFRAME = os.getenv("FEATURE_TIMEFRAME", "1h")
+WARM_SYMBOLS = [s for s in os.getenv("WARM_SYMBOLS", "BTC-USD").split(",") if s]
+store = FeatureStore(timeframe=FEATURE_TIMEFRAME)
+
+def live_features(symbol, price, ind):
+    vector = store.live(symbol, price)
+    # No bar history at all: RSI from the packet, the rest left missing for the trees
+    return vector if vector is not None else (float(ind.get('rsi', 50)), np.nan, np.nan)
+
+# Every emitted call is graded after OUTCOME_HORIZON seconds (see outcomes.py)
+tracker = OutcomeTracker(r)
+
+# --- ⚡ BATCHED PREDICTION ---
+# Messages are drained in micro-batches and their feature rows written into one preallocated
+# matrix, so the model is called once per batch instead of once per message.
+BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", "256"))
+BATCH_WAIT_MS = int(os.getenv("INFERENCE_BATCH_WAIT_MS", "20"))
+feature_buffer = np.zeros((BATCH_SIZE, 3))
+# MULTI/EXEC around the result writes, so readers never see a half-written batch
+ATOMIC_PUBLISH = os.getenv("INFERENCE_ATOMIC_PUBLISH", "0") == "1"
+
+def predict_batch(n):
+    # Bullish probability (0-100) for the first n rows of feature_buffer
+    rows = feature_buffer[:n]
+    model, _ = loaded
+    if model: return model.predict_proba(rows)[:, 1] * 100
+    # Fallback Logic
+    rsi = np.nan_to_num(rows[:, 0], nan=50.0)
+    return np.where(rsi < 30, 70.0, np.where(rsi > 70, 30.0, 50.0))
+
+def process_batch(messages):
+    packets = []
+    for message in messages:
+        try:
+            data = json.loads(message['data'])
+            ind = data['indicators']
+            price = float(data.get('price', 0))
+            feature_buffer[len(packets)] = live_features(data['symbol'], price, ind)
+            packets.append((data, ind, price))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"⚠️ Inference Error: bad packet ({e})")
+    if not packets: return
+
+    calls = [decide(data, ind, price, bullish_prob) for (data, ind, price), bullish_prob in zip(packets, predict_batch(len(packets)).tolist())]
+
+    # Round trip 1: grade + remember every call, in message order
+    stats = grade_calls(calls)
+
+    # Round trip 2: every result write for the batch; only the newest value per key is SET
+    results = []
+    for call, board in zip(calls, stats):
+        call["stats"] = board
+        results.append((call, json.dumps({
+            "symbol": call["symbol"], "bias": call["bias"], "probability": call["probability"],
+            "win_rate": board.get('win_rate', 0), "total_trades": board.get('total', 0)
+        })))
+    pipe = r.pipeline(transaction=ATOMIC_PUBLISH)
+    for symbol, (call, body) in {call["symbol"]: (call, body) for call, body in results}.items():
+        pipe.set(f"latest_prediction:{symbol}", body)
+        pipe.set(f"latest_narrative:{symbol}", call["narrative"])
+    pipe.set("latest_prediction", results[-1][1])
+    pipe.set("latest_narrative", results[-1][0]["narrative"])
+    for _, body in results: pipe.publish("inference_results", body)
+
+    # Same round trip: publish these prices, resolve calls that came due with them, then
+    # start tracking the new ones
+    now = time.time()
+    for call in calls: tracker.observe(call["symbol"], call["price"], now, client=pipe)
+    resolve_at = len(pipe)
+    tracker.resolve(now, client=pipe)
+    version = (loaded[1] or {}).get("version")
+    for call, row in zip(calls, feature_buffer[:len(calls)].tolist()):
+        row = [None if np.isnan(v) else v for v in row]
+        tracker.record(call["symbol"], call["price"], call["bias"], call["probability"], row, version, now, client=pipe)
+    try: tracker.finish(pipe.execute()[resolve_at])
+    except redis.exceptions.NoScriptError:
+        # Everything else was applied; only the resolve needs the script reloaded and run again
+        tracker.load()
+        tracker.resolve(now)
+
+    for call in calls:
+        # Print to log to prove it's the new code
+        print(f"🔮 PRED: {call['bias']} ({call['probability']}%) | NEWS: {call['headline']}")
+        try: send_alert(call)
+        except Exception as e: print(f"⚠️ Inference Error: {e}")
+
+def decide(data, ind, price, bullish_prob):
+    sentiment = float(ind.get('sentiment', 0.0))
+    headline = ind.get('headline', "")
+
+    adjustment = sentiment * 10 
+    final_prob = max(0.0, min(100.0, round(bullish_prob + adjustment, 1)))
+    final_bias = "BULLISH" if final_prob > 50 else "BEARISH"
+
+    # --- NARRATIVE GENERATOR ---
+    narrative = f"Technical Analysis ({final_bias}): {final_prob}% confidence."
     
-    last_trade = r.get("memory_last_trade")
-    if last_trade:
-        memory = json.loads(last_trade)
-        entry = memory['price']
-        bias = memory['bias']
-        if abs(current_price - entry) > 50:
-            outcome = "HOLD"
-            if bias == "BULLISH" and current_price > entry: outcome = "WIN"
-            elif bias == "BEARISH" and current_price < entry: outcome = "WIN"
-            elif bias == "BULLISH" and current_price < entry: outcome = "LOSS"
-            elif bias == "BEARISH" and current_price > entry: outcome = "LOSS"
-            
-            if outcome != "HOLD":
-                stats['total'] += 1
-                if outcome == "WIN": stats['wins'] += 1
-                if stats['total'] > 0: stats['win_rate'] = int((stats['wins'] / stats['total']) * 100)
-                r.set("scoreboard_stats", json.dumps(stats))
-    return stats
+    if headline and headline != "News module loading..." and headline != "News Disabled (Install vaderSentiment)":
+         narrative += f" News context: {headline}"
+    else:
+         narrative += " (No breaking news detected)"
+
+    return {"symbol": data['symbol'], "price": price, "bias": final_bias, "probability": final_prob,
+            "narrative": narrative, "headline": headline, "risk": ind.get('risk_level', 'LOW')}
+
+def send_alert(call):
+    final_prob, final_bias, stats = call["probability"], call["bias"], call["stats"]
+    # Discord Alert
+    if (final_prob > CONFIDENCE_THRESHOLD or final_prob < (100-CONFIDENCE_THRESHOLD)) and call["risk"] != "HIGH":
+         alerts.publish({
+             "instrument": call['symbol'], "direction": final_bias,
+             "embed": {
+                 "title": f"🧠 AI SIGNAL: {call['symbol']} {final_bias}",
+                 "description": call["narrative"],
+                 "color": 5763719 if final_bias == "BULLISH" else 15548997,
+                 "fields": [
+                     {"name": "Price", "value": f"${call['price']:,.2f}", "inline": True},
+                     {"name": "Confidence", "value": f"{final_prob}%", "inline": True},
+                     {"name": "Win Rate", "value": f"{stats.get('win_rate', 0)}% ({stats.get('total', 0)} trades)", "inline": True}
+                 ],
+                 "footer": {"text": "ForwardFin AI Brain"}
+             }
+         })
 
 def run_inference():
+    load_grade_script()
+    tracker.load()
     pubsub = r.pubsub()
     pubsub.subscribe('analysis_results')
     print("👂 AI LISTENER: Ready...")
     
-    for message in pubsub.listen():
-        if message['type'] != 'message': continue
-        try:
-            data = json.loads(message['data'])
-            ind = data['indicators']
-            price = float(data.get('price', 0))
-            rsi = float(ind.get('rsi', 50))
-            macd = float(ind.get('macd', 0))
-            roc = (macd / price) * 100 if price != 0 else 0
-            sentiment = float(ind.get('sentiment', 0.0))
-            headline = ind.get('headline', "")
-            risk = ind.get('risk_level', 'LOW')
-
-            stats = update_scoreboard(price)
-
-            # Prediction Logic
-            if HAS_ML and model:
-                features = pd.DataFrame([[rsi, macd, roc]], columns=['RSI', 'MACD', 'ROC'])
-                probs = model.predict_proba(features)[0]
-                bullish_prob = float(probs[1] * 100)
-            else:
-                # Fallback Logic
-                bullish_prob = 50.0
-                if rsi < 30: bullish_prob = 70.0
-                if rsi > 70: bullish_prob = 30.0
-
-            adjustment = sentiment * 10 
-            final_prob = max(0.0, min(100.0, round(bullish_prob + adjustment, 1)))
-            final_bias = "BULLISH" if final_prob > 50 else "BEARISH"
-
-            # --- NARRATIVE GENERATOR ---
-            narrative = f"Technical Analysis ({final_bias}): {final_prob}% confidence."
-            
-            if headline and headline != "News module loading..." and headline != "News Disabled (Install vaderSentiment)":
-                 narrative += f" News context: {headline}"
-            else:
-                 narrative += " (No breaking news detected)"
-
-            # Print to log to prove it's the new code
-            print(f"🔮 PRED: {final_bias} ({final_prob}%) | NEWS: {headline}")
-            
-            result = { 
-                "symbol": data['symbol'], "bias": final_bias, "probability": final_prob, 
-                "win_rate": stats.get('win_rate', 0), "total_trades": stats.get('total', 0) 
-            }
-            
-            r.set("latest_prediction", json.dumps(result))
-            r.set("latest_narrative", narrative)
-            r.publish("inference_results", json.dumps(result))
-            
-            memory_packet = {"price": price, "bias": final_bias}
-            r.set("memory_last_trade", json.dumps(memory_packet))
-
-            # Discord Alert
-            if (final_prob > CONFIDENCE_THRESHOLD or final_prob < (100-CONFIDENCE_THRESHOLD)) and risk != "HIGH":
-                 # Simple Alert Logic
-                 pass 
-
-        except Exception as e:
-            print(f"⚠️ Inference Error: {e}")
+    while True:
+        batch = drain(pubsub, BATCH_SIZE, BATCH_WAIT_MS)
+        if not batch: continue
+        try: process_batch(batch)
+        except Exception as e: print(f"⚠️ Inference Error: {e}")
 
 if __name__ == "__main__":
+    alerts.start()
+    for symbol in WARM_SYMBOLS: store.history(symbol)
+    threading.Thread(target=run_model_watcher, name="model-watcher", daemon=True).start()
+    if RETRAIN_INTERVAL and HAS_TRAINER: threading.Thread(target=run_retrainer, name="retrainer", daemon=True).start()
     run_inference()
\ No newline at end of file
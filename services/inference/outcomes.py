@@ -0,0 +1,127 @@
+import json
+import os
+import time
+import uuid
+
+# --- 🎯 OUTCOME TRACKER ---
+# Every emitted prediction waits in a Redis sorted set scored by its due time (emitted +
+# horizon), so pending calls survive restarts and are shared by every replica. Each batch
+# publishes its prices and runs RESOLVE_SCRIPT, which atomically claims whatever has come
+# due and has a price seen at or after its due time: each prediction is labelled by exactly
+# one replica. The script also keeps rolling accuracy per symbol and per confidence bucket
+# and the shared outcome_stats summary. The replica that claims a row appends it to a
+# JSONL file that the trainer can learn from.
+
+OUTCOME_HORIZON = int(os.getenv("OUTCOME_HORIZON", "3600"))
+OUTCOME_FILE = os.getenv("OUTCOME_FILE", "data/outcomes/outcomes.jsonl")
+ROLLING_WINDOW = 200
+BUCKETS = (50, 60, 70, 80, 90)
+PREFIX = "outcomes"
+
+def bucket_of(probability):
+    confidence = max(probability, 100 - probability)
+    label = max(b for b in BUCKETS if confidence >= b)
+    return f"{label}-{min(label + 10, 100)}"
+
+# KEYS: pending zset, prices hash, rolling hash, stats hash, outcome_stats
+# ARGV: now, horizon, window, prefix for the per-series hit lists
+# Predictions whose symbol has no price since the due time wait for one and are dropped
+# after a further horizon without any. Returns {member, seen, hit} for every labelled row.
+RESOLVE_SCRIPT = """
+local now, horizon, window = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local labelled, expired = {}, 0
+for _, member in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)) do
+    local prediction = cjson.decode(member)
+    local seen = redis.call('HGET', KEYS[2], prediction['symbol'])
+    local at, price
+    if seen then
+        local pair = cjson.decode(seen)
+        at, price = pair[1], pair[2]
+    end
+    if seen and at >= prediction['due'] then
+        redis.call('ZREM', KEYS[1], member)
+        local hit = ((prediction['bias'] == 'BULLISH') == (price > prediction['price'])) and 1 or 0
+        for _, series in ipairs({'symbol:' .. prediction['symbol'], 'bucket:' .. prediction['bucket']}) do
+            local hits = ARGV[4] .. ':hits:' .. series
+            local n = redis.call('LPUSH', hits, hit)
+            if n > window then redis.call('HINCRBY', KEYS[3], series .. ':correct', -tonumber(redis.call('RPOP', hits))) end
+            redis.call('HINCRBY', KEYS[3], series .. ':correct', hit)
+            redis.call('HSET', KEYS[3], series .. ':n', math.min(n, window))
+        end
+        table.insert(labelled, {member, seen, hit})
+    elseif now - prediction['due'] > horizon then
+        redis.call('ZREM', KEYS[1], member)
+        expired = expired + 1
+    end
+end
+if #labelled == 0 and expired == 0 then return labelled end
+
+redis.call('HINCRBY', KEYS[4], 'resolved', #labelled)
+redis.call('HINCRBY', KEYS[4], 'expired', expired)
+local summary = {recorded = 0, resolved = 0, expired = 0, pending = redis.call('ZCARD', KEYS[1]), horizon = horizon,
+                 symbols = {}, buckets = {}}
+local stats = redis.call('HGETALL', KEYS[4])
+for i = 1, #stats, 2 do summary[stats[i]] = tonumber(stats[i + 1]) end
+local rolling = redis.call('HGETALL', KEYS[3])
+local counts = {}
+for i = 1, #rolling, 2 do
+    local series, field = string.match(rolling[i], '^(.*):(%a+)$')
+    counts[series] = counts[series] or {}
+    counts[series][field] = tonumber(rolling[i + 1])
+end
+for series, c in pairs(counts) do
+    local kind, name = string.match(series, '^(%a+):(.*)$')
+    local n = c['n'] or 0
+    local accuracy = n > 0 and math.floor((c['correct'] or 0) * 1000 / n + 0.5) / 10 or nil
+    summary[kind == 'symbol' and 'symbols' or 'buckets'][name] = {accuracy = accuracy, n = n}
+end
+redis.call('SET', KEYS[5], cjson.encode(summary))
+return labelled
+"""
+
+class OutcomeTracker:
+    def __init__(self, client, horizon=OUTCOME_HORIZON, path=OUTCOME_FILE, window=ROLLING_WINDOW, prefix=PREFIX):
+        self.r = client
+        self.horizon = horizon
+        self.path = path
+        self.window = window
+        self.prefix = prefix
+        self.keys = [f"{prefix}:pending", f"{prefix}:prices", f"{prefix}:rolling", f"{prefix}:stats", "outcome_stats"]
+        self.sha = None
+
+    def load(self):
+        self.sha = self.r.script_load(RESOLVE_SCRIPT)
+
+    def observe(self, symbol, price, ts=None, client=None):
+        (client or self.r).hset(self.keys[1], symbol, json.dumps([time.time() if ts is None else ts, price]))
+
+    def record(self, symbol, price, bias, probability, features=None, model=None, ts=None, client=None):
+        ts = time.time() if ts is None else ts
+        prediction = {"id": uuid.uuid4().hex[:12], "symbol": symbol, "ts": ts, "due": ts + self.horizon, "price": price,
+                      "bias": bias, "probability": probability, "bucket": bucket_of(probability),
+                      "features": features, "model": model}
+        client = client or self.r
+        client.zadd(self.keys[0], {json.dumps(prediction): prediction["due"]})
+        client.hincrby(self.keys[3], "recorded", 1)
+
+    def resolve(self, now=None, client=None):
+        # Label everything due by `now`. With a pipeline as client the reply comes back
+        # from execute(); pass it to finish()
+        if self.sha is None: self.load()
+        reply = (client or self.r).evalsha(self.sha, len(self.keys), *self.keys,
+                                           time.time() if now is None else now, self.horizon, self.window, self.prefix)
+        return reply if client is not None else self.finish(reply)
+
+    def finish(self, reply):
+        labelled = []
+        for member, seen, hit in reply:
+            prediction = json.loads(member)
+            resolved_ts, exit_price = json.loads(seen)
+            labelled.append({**{k: v for k, v in prediction.items() if k not in ("id", "due", "bucket")},
+                             "resolved_ts": resolved_ts, "exit_price": exit_price,
+                             "up": int(exit_price > prediction["price"]), "correct": int(hit)})
+        if labelled and self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(row) + "\n" for row in labelled))
+        return labelled
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from services.common.features import FEATURES
+from services.inference import trees
+
+# --- 🗄️ MODEL REGISTRY ---
+# Each trained model lives in MODEL_DIR/<version>/ next to a meta.json holding its feature
+# schema, training window and metrics. The version is a hash of the model bytes plus the
+# schema, and MODEL_DIR/LATEST names the current one. Versions are written to a temp dir
+# and renamed into place, so readers only ever see complete models. Next to the XGBoost
+# file sits a compiled trees.npz, which is what the service loads: no xgboost needed.
+
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+SCHEMA_VERSION = 1
+MODEL_FILE = "model.json"
+TREES_FILE = "trees.npz"
+
+def schema(features=FEATURES):
+    return {"version": SCHEMA_VERSION, "features": list(features)}
+
+def compatible(meta, features=FEATURES):
+    return meta.get("schema") == schema(features)
+
+def save(model, window, metrics, features=FEATURES, root=MODEL_DIR):
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=root)
+    try:
+        model.save_model(os.path.join(staging, MODEL_FILE))
+        trees.export(model, os.path.join(staging, TREES_FILE), features)
+        with open(os.path.join(staging, MODEL_FILE), "rb") as f:
+            digest = hashlib.sha256(f.read() + json.dumps(schema(features), sort_keys=True).encode())
+        version = digest.hexdigest()[:12]
+        meta = {"version": version, "schema": schema(features), "window": window,
+                "metrics": metrics, "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "created_at": time.time()}
+        with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        target = os.path.join(root, version)
+        if os.path.exists(target): shutil.rmtree(staging)  # Same bytes, same schema: already registered
+        else: os.rename(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    promote(version, root)
+    return meta
+
+def promote(version, root=MODEL_DIR):
+    # Atomic pointer flip: write LATEST.tmp then rename over LATEST
+    tmp = os.path.join(root, "LATEST.tmp")
+    with open(tmp, "w", encoding="utf-8") as f: f.write(version)
+    os.replace(tmp, os.path.join(root, "LATEST"))
+
+def read_meta(version, root=MODEL_DIR):
+    with open(os.path.join(root, version, "meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def versions(root=MODEL_DIR):
+    # Newest first
+    if not os.path.isdir(root): return []
+    metas = []
+    for name in os.listdir(root):
+        if name.startswith(".") or not os.path.isfile(os.path.join(root, name, "meta.json")): continue
+        metas.append(read_meta(name, root))
+    return sorted(metas, key=lambda m: m.get("created_at", 0), reverse=True)
+
+def latest_version(root=MODEL_DIR):
+    try:
+        with open(os.path.join(root, "LATEST"), encoding="utf-8") as f: return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def load(version, root=MODEL_DIR, compiled=True):
+    # compiled=True serves the NumPy ensemble; the XGBoost model is for training tools
+    meta = read_meta(version, root)
+    compiled_path = os.path.join(root, version, TREES_FILE)
+    if compiled and os.path.exists(compiled_path): return trees.TreeEnsemble.load(compiled_path), meta
+
+    import xgboost as xgb
+    model = xgb.XGBClassifier()
+    model.load_model(os.path.join(root, version, MODEL_FILE))
+    if compiled:
+        # Registered before models were compiled: compile once, serve the compiled form
+        trees.export(model, compiled_path, meta["schema"]["features"])
+        return trees.TreeEnsemble.load(compiled_path), meta
+    return model, meta
+
+def load_latest(features=FEATURES, root=MODEL_DIR):
+    # The LATEST model if its schema matches, otherwise the newest compatible one
+    candidates = [latest_version(root)] + [m["version"] for m in versions(root)]
+    for version in dict.fromkeys(v for v in candidates if v):
+        try:
+            if not compatible(read_meta(version, root), features): continue
+            return load(version, root)
+        except (OSError, ValueError, KeyError, ImportError) as e:
+            print(f"⚠️ REGISTRY: Skipping model {version}: {e}", flush=True)
+    return None, None
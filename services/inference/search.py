@@ -0,0 +1,145 @@
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from services.common import features
+from services.inference import registry, train, trees, walkforward
+
+# --- 🔎 HYPERPARAMETER SEARCH ---
+# python -m services.inference.search [symbol] [period] [--random N] [--workers N] [--challenge]
+# The feature matrix is built once and placed in shared memory; pool workers attach to it
+# instead of receiving a pickled copy per candidate. Rows are split in time order into
+# fit / early-stopping validation / selection / test. Candidates are ranked by selection
+# logloss; the winner's reported metrics come from the test rows, which no candidate or
+# ranking has seen. It is then refit on all rows and registered with its parameters and
+# latency profile.
+
+SPACE = {
+    "n_estimators": [100, 200, 400],
+    "max_depth": [2, 3, 4, 5],
+    "learning_rate": [0.03, 0.1, 0.3],
+    "subsample": [0.8, 1.0],
+    "min_child_weight": [1, 5],
+}
+EARLY_STOPPING_ROUNDS = 20
+VALIDATION = 0.2  # Share of the training rows used for early stopping
+
+_shared = {}
+
+def _attach(x_name, y_name, shape):
+    # Pool initializer: map the parent's arrays without copying them
+    for key, name, dtype, dims in (("X", x_name, np.float64, shape), ("y", y_name, np.int64, shape[:1])):
+        # The parent owns and unlinks the blocks: attaching must not leave the resource
+        # tracker owning them too (track=False from 3.13; before that, unregister)
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            block = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(block._name, "shared_memory")
+        _shared[key + "_block"] = block
+        _shared[key] = np.ndarray(dims, dtype=dtype, buffer=block.buf)
+
+def _share(array, dtype):
+    array = np.ascontiguousarray(array, dtype=dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=dtype, buffer=block.buf)[:] = array
+    return block
+
+def candidates(space=SPACE, samples=None, seed=0):
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    if samples and samples < len(grid): return random.Random(seed).sample(grid, samples)
+    return grid
+
+def splits(n, holdout=train.HOLDOUT, validation=VALIDATION):
+    # (fit end, selection start, test start): the last `holdout` of rows is the final test,
+    # the `holdout` before it ranks candidates, and early stopping uses `validation` of the rest
+    test = int(n * (1 - holdout))
+    select = int(test * (1 - holdout))
+    return int(select * (1 - validation)), select, test
+
+def run_candidate(params):
+    X, y = _shared["X"], _shared["y"]
+    fit_end, select, test = splits(len(X))
+    started = time.perf_counter()
+    model = train.fit(X[:fit_end], y[:fit_end], n_jobs=1, early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                      **params, fit_kwargs={"eval_set": [(X[fit_end:select], y[fit_end:select])], "verbose": False})
+    train_seconds = time.perf_counter() - started
+    best = int(getattr(model, "best_iteration", params["n_estimators"] - 1)) + 1
+    return {"params": params, "trees": best, "train_s": round(train_seconds, 3), **train.evaluate(model, X[select:test], y[select:test])}
+
+def latency_profile(model, X):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trees.npz")
+        trees.export(model, path, features.FEATURES)
+        compiled = trees.TreeEnsemble.load(path)
+    row = walkforward.per_row_latency(compiled.predict_proba, X)
+    started = time.perf_counter()
+    compiled.predict_proba(X)
+    return {"compiled_row": round(row * 1e6, 1), "compiled_batch_row": round((time.perf_counter() - started) / len(X) * 1e6, 2)}
+
+def search(X, y, configs, workers=None):
+    x_block, y_block = _share(X, np.float64), _share(y, np.int64)
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_attach,
+                                 initargs=(x_block.name, y_block.name, X.shape)) as pool:
+            results = []
+            for i, result in enumerate(pool.map(run_candidate, configs), 1):
+                results.append(result)
+                print(f"  {i:>3}/{len(configs)} logloss {result['logloss']:.4f} acc {result['accuracy']:.3f} "
+                      f"trees {result['trees']:>3} {result['params']}", flush=True)
+    finally:
+        for block in (x_block, y_block):
+            block.close()
+            # Workers may have unregistered the name; register again so unlink's unregister pairs up
+            if sys.version_info < (3, 13): resource_tracker.register(block._name, "shared_memory")
+            block.unlink()
+    return sorted(results, key=lambda r: r["logloss"])
+
+def main(symbol="BTC-USD", period="1mo", interval="1h", samples=None, workers=None, challenge=False):
+    df = train.build_dataset(symbol, period, interval)
+    if df is None or len(df) < 100: raise ValueError(f"Not enough rows for {symbol}")
+    X, y = df[features.FEATURES].to_numpy(), df['Target'].to_numpy()
+    configs = candidates(samples=samples)
+    print(f"🔎 SEARCH: {len(configs)} candidates over {len(X)} rows on {workers or os.cpu_count()} workers", flush=True)
+    started = time.perf_counter()
+    ranked = search(X, y, configs, workers)
+    winner = ranked[0]
+    print(f"🏆 SEARCH: Best after {time.perf_counter() - started:.1f}s: {winner}", flush=True)
+
+    # The winner's configuration, with its early-stopped tree count, is refit on every row
+    # before the test slice and scored on it; --challenge compares it with the current
+    # model (see train.beats_current)
+    *_, test = splits(len(X))
+    params = {**winner["params"], "n_estimators": winner["trees"]}
+    challenger = train.fit(X[:test], y[:test], **params)
+    metrics = train.evaluate(challenger, X[test:], y[test:])
+    if challenge:
+        won, baseline = train.beats_current(challenger, X, y, df.index, test)
+        if not won: return None
+        if baseline: metrics["baseline"] = baseline
+
+    # Refit on every row, then profile what will be served
+    model = train.fit(X, y, **params)
+    metrics.update({"params": params, "selection_logloss": winner["logloss"], "latency_us": latency_profile(model, X[test:]),
+                    "candidates": len(configs)})
+    window = {"symbol": symbol, "interval": interval, "start": str(df.index[0]), "end": str(df.index[-1]), "rows": len(df)}
+    meta = registry.save(model, window, metrics)
+    print(f"✅ SEARCH: Registered model {meta['version']} {metrics}", flush=True)
+    return meta
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search for the swing classifier")
+    parser.add_argument("symbol", nargs="?", default="BTC-USD")
+    parser.add_argument("period", nargs="?", default="1mo")
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--random", type=int, default=None, help="Sample this many configurations instead of the full grid")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--challenge", action="store_true", help="Only register the winner if it beats the current model")
+    args = parser.parse_args()
+    main(args.symbol, args.period, args.interval, args.random, args.workers, args.challenge)
@@ -0,0 +1,100 @@
+import sys
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from services.common import features
+from services.inference import registry
+
+# --- 🎓 TRAINER ---
+# python -m services.inference.train [--challenge] [symbol] [period]
+# Downloads hourly history, trains the classifier, scores it on the most recent 20% of
+# rows and registers it as the LATEST model for the inference service to pick up.
+# With --challenge the new model is only registered if it scores no worse than the current
+# one on rows the current one has not been trained on.
+
+HOLDOUT = 0.2
+PARAMS = {"n_estimators": 100, "max_depth": 3}
+CALIBRATION_BINS = 10
+MIN_UNSEEN = 24  # Rows after the current model's window needed to score it directly
+
+def label(df):
+    df = df.copy()
+    df['Target'] = (df['Close'].shift(-1) > df['Close']).astype(int)
+    df = df.iloc[:-1]  # The last bar has no next close to label it
+    return df.dropna()
+
+def build_dataset(symbol, period, interval):
+    # Features come from the shared store, exactly as the live service computes them.
+    # Read-only: the service is the one writer of the stored bars (see features.py)
+    close = features.fetch_closes(symbol, interval, period)
+    if not len(close): return None
+    df = features.FeatureStore(timeframe=interval, persist=False).refresh(symbol, close)
+    return label(df[df.index >= close.index[0]])
+
+def calibration_error(probs, y, bins=CALIBRATION_BINS):
+    # Expected calibration error: |mean predicted - observed rate| per bin, weighted by bin size
+    which = np.minimum((probs * bins).astype(int), bins - 1)
+    error = 0.0
+    for b in np.unique(which):
+        mask = which == b
+        error += mask.mean() * abs(probs[mask].mean() - y[mask].mean())
+    return error
+
+def evaluate(model, X, y):
+    probs = np.clip(model.predict_proba(X)[:, 1], 1e-7, 1 - 1e-7)
+    return {
+        "accuracy": round(float(np.mean((probs > 0.5) == y)), 4),
+        "logloss": round(float(-np.mean(y * np.log(probs) + (1 - y) * np.log(1 - probs))), 4),
+        "brier": round(float(np.mean((probs - y) ** 2)), 4),
+        "ece": round(float(calibration_error(probs, y)), 4),
+        "rows": int(len(y)),
+    }
+
+def fit(X, y, fit_kwargs=None, **params):
+    model = xgb.XGBClassifier(**{**PARAMS, **params}, eval_metric='logloss')
+    model.fit(X, y, **(fit_kwargs or {}))
+    return model
+
+def beats_current(challenger, X, y, index, split):
+    # The registered model is scored on rows after its training window, which it has never
+    # seen, next to the challenger (fit on X[:split]). With fewer than MIN_UNSEEN such rows
+    # its configuration is refit on X[:split] and both are scored on X[split:] instead.
+    # Ties go to the challenger: a fresher window with the same configuration replaces it.
+    current, current_meta = registry.load_latest()
+    if current is None: return True, None
+    start = max(split, int(index.searchsorted(pd.Timestamp(current_meta["window"]["end"]), side="right")))
+    if len(X) - start >= MIN_UNSEEN:
+        incumbent, scored = current, "unseen"
+    else:
+        params = current_meta.get("metrics", {}).get("params", PARAMS)
+        incumbent, scored, start = fit(X[:split], y[:split], **params), "refit", split
+    baseline = evaluate(incumbent, X[start:], y[start:])
+    scores = evaluate(challenger, X[start:], y[start:])
+    won = scores["logloss"] <= baseline["logloss"]
+    if not won: print(f"🛑 TRAINER: Challenger {scores} does not beat {current_meta['version']} ({scored}) {baseline}", flush=True)
+    return won, {"version": current_meta["version"], "scored": scored, **baseline}
+
+def train(symbol="BTC-USD", period="1mo", interval="1h", challenge=False):
+    print(f"🎓 TRAINER: Downloading {symbol} history ({period} @ {interval})...", flush=True)
+    df = build_dataset(symbol, period, interval)
+    if df is None or len(df) < 50: raise ValueError(f"Only {0 if df is None else len(df)} usable rows for {symbol}")
+
+    X, y = df[registry.FEATURES].to_numpy(), df['Target'].to_numpy()
+    split = int(len(df) * (1 - HOLDOUT))
+    challenger = fit(X[:split], y[:split])
+    metrics = {**evaluate(challenger, X[split:], y[split:]), "params": PARAMS}
+
+    if challenge:
+        won, baseline = beats_current(challenger, X, y, df.index, split)
+        if not won: return None
+        if baseline: metrics["baseline"] = baseline
+
+    # Holdout metrics come from the model fit on the first 80%; the registered model sees everything
+    window = {"symbol": symbol, "interval": interval, "start": str(df.index[0]), "end": str(df.index[-1]), "rows": len(df)}
+    meta = registry.save(fit(X, y), window, metrics)
+    print(f"✅ TRAINER: Registered model {meta['version']} {metrics}", flush=True)
+    return meta
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--challenge"]
+    train(*args[:2], challenge="--challenge" in sys.argv[1:])
@@ -0,0 +1,82 @@
+import json
+import os
+import numpy as np
+
+# --- 🌲 COMPILED TREE ENSEMBLE ---
+# A trained XGBoost classifier flattened into fixed-shape arrays (one row per tree, one
+# column per node). Prediction walks every tree for every row at once, one level per step,
+# so serving needs NumPy only: xgboost is imported by the trainer, never by the service.
+
+def _base_margin(booster):
+    # base_score is stored as a probability; the trees add to its logit
+    params = json.loads(booster.save_config())["learner"]["learner_model_param"]
+    base = float(str(params["base_score"]).strip("[]"))
+    return float(np.log(base / (1 - base)))
+
+def export(model, path, features=None):
+    booster = model.get_booster()
+    names = features or booster.feature_names or []
+    trees = [json.loads(dump) for dump in booster.get_dump(dump_format="json")]
+
+    def nodes(tree):
+        stack = [(tree, 0)]
+        while stack:
+            node, level = stack.pop()
+            yield node, level
+            stack.extend((child, level + 1) for child in node.get("children", []))
+
+    width = max(max(node["nodeid"] for node, _ in nodes(tree)) + 1 for tree in trees)
+    feature = np.zeros((len(trees), width), dtype=np.int32)
+    threshold = np.zeros((len(trees), width), dtype=np.float32)
+    left = np.zeros((len(trees), width), dtype=np.int32)
+    right = np.zeros((len(trees), width), dtype=np.int32)
+    missing = np.zeros((len(trees), width), dtype=np.int32)
+    value = np.zeros((len(trees), width), dtype=np.float64)
+    depth = 0
+    for t, tree in enumerate(trees):
+        for node, level in nodes(tree):
+            i = node["nodeid"]
+            if "leaf" in node:
+                # Leaves point back at themselves, so extra steps leave finished rows in place
+                left[t, i] = right[t, i] = missing[t, i] = i
+                value[t, i] = node["leaf"]
+                continue
+            split = node["split"]
+            feature[t, i] = names.index(split) if split in names else int(split.lstrip("f"))
+            threshold[t, i] = node["split_condition"]
+            left[t, i], right[t, i], missing[t, i] = node["yes"], node["no"], node["missing"]
+            depth = max(depth, level + 1)
+
+    tmp = f"{path}.tmp.npz"
+    np.savez(tmp, feature=feature, threshold=threshold, left=left, right=right, missing=missing,
+             value=value, depth=np.int32(depth), base_margin=np.float64(_base_margin(booster)))
+    os.replace(tmp, path)
+
+class TreeEnsemble:
+    def __init__(self, feature, threshold, left, right, missing, value, depth, base_margin):
+        self.feature, self.threshold = feature, threshold
+        self.left, self.right, self.missing = left, right, missing
+        self.value = value
+        self.depth = int(depth)
+        self.base_margin = float(base_margin)
+        self.tree_index = np.arange(len(feature))[None, :]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(**{name: arrays[name] for name in arrays.files})
+
+    def margin(self, X):
+        # XGBoost compares in float32: x < threshold goes "yes", NaN follows "missing"
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.zeros((len(X), len(self.feature)), dtype=np.int32)
+        for _ in range(self.depth):
+            x = X[rows, self.feature[self.tree_index, node]]
+            nxt = np.where(x < self.threshold[self.tree_index, node], self.left[self.tree_index, node], self.right[self.tree_index, node])
+            node = np.where(np.isnan(x), self.missing[self.tree_index, node], nxt)
+        return self.base_margin + self.value[self.tree_index, node].sum(axis=1)
+
+    def predict_proba(self, X):
+        p = 1 / (1 + np.exp(-self.margin(X)))
+        return np.column_stack((1 - p, p))
@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from services.common import features
+from services.inference import train, trees
+
+# --- 🚶 WALK-FORWARD VALIDATION ---
+# python -m services.inference.walkforward [symbol] [--train 480] [--test 48] [--step 48] [--workers N]
+# Slides a train/test window over the stored feature history. Each window is trained and
+# scored in its own process and reports accuracy, logloss, Brier, calibration error,
+# training time and per-row latency of the compiled (served) and XGBoost models.
+
+LATENCY_ROWS = 200
+
+def windows(n, train_rows, test_rows, step):
+    return [(start, start + train_rows, min(start + train_rows + test_rows, n))
+            for start in range(0, n - train_rows - test_rows + 1, step)]
+
+def per_row_latency(predict, X, rows=LATENCY_ROWS):
+    # Mean seconds per single-row call, i.e. one message at a time
+    sample = X[np.arange(rows) % len(X)]
+    started = time.perf_counter()
+    for i in range(rows): predict(sample[i:i + 1])
+    return (time.perf_counter() - started) / rows
+
+def run_window(X, y, bounds, params):
+    start, split, end = bounds
+    started = time.perf_counter()
+    model = train.fit(X[start:split], y[start:split], n_jobs=1, **params)
+    train_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trees.npz")
+        trees.export(model, path, features.FEATURES)
+        compiled = trees.TreeEnsemble.load(path)
+
+    X_test, y_test = X[split:end], y[split:end]
+    row = per_row_latency(compiled.predict_proba, X_test)  # Also warms the evaluator up
+    started = time.perf_counter()
+    compiled.predict_proba(X_test)
+    batch_row = (time.perf_counter() - started) / len(X_test)
+    return {
+        "train": [start, split], "test": [split, end],
+        **train.evaluate(compiled, X_test, y_test),
+        "train_s": round(train_seconds, 3),
+        "latency_us": {
+            "compiled_row": round(row * 1e6, 1),
+            "compiled_batch_row": round(batch_row * 1e6, 2),
+            "xgboost_row": round(per_row_latency(model.predict_proba, X_test) * 1e6, 1),
+        },
+    }
+
+def summarize(results):
+    keys = ["accuracy", "logloss", "brier", "ece", "train_s"]
+    summary = {key: round(float(np.mean([r[key] for r in results])), 4) for key in keys}
+    summary["accuracy_std"] = round(float(np.std([r["accuracy"] for r in results])), 4)
+    for key in results[0]["latency_us"]:
+        summary[f"{key}_us"] = round(float(np.median([r["latency_us"][key] for r in results])), 2)
+    summary["windows"] = len(results)
+    return summary
+
+def walk_forward(X, y, train_rows=480, test_rows=48, step=48, workers=None, params=None):
+    bounds = windows(len(X), train_rows, test_rows, step)
+    if not bounds: raise ValueError(f"{len(X)} rows is too short for a {train_rows}+{test_rows} window")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        results = list(pool.map(run_window, [X] * len(bounds), [y] * len(bounds), bounds, [params or {}] * len(bounds)))
+    return results, summarize(results)
+
+def load_dataset(symbol, timeframe="1h", period="3mo"):
+    # Stored bars, topped up from the exchange in memory when stale
+    frame = features.FeatureStore(timeframe=timeframe, persist=False).history(symbol, period=period)
+    if frame is None: raise ValueError(f"No stored history for {symbol}")
+    df = train.label(frame)
+    return df[features.FEATURES].to_numpy(), df['Target'].to_numpy()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward validation of the swing classifier")
+    parser.add_argument("symbol", nargs="?", default="BTC-USD")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--train", type=int, default=480)
+    parser.add_argument("--test", type=int, default=48)
+    parser.add_argument("--step", type=int, default=48)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--json", help="Also write every window's results to this file")
+    args = parser.parse_args()
+
+    X, y = load_dataset(args.symbol, args.timeframe)
+    print(f"🚶 WALK-FORWARD: {args.symbol} {len(X)} rows, train {args.train} / test {args.test} / step {args.step}", flush=True)
+    results, summary = walk_forward(X, y, args.train, args.test, args.step, args.workers)
+    for r in results:
+        print(f"  [{r['test'][0]:>5}:{r['test'][1]:<5}] acc {r['accuracy']:.3f}  logloss {r['logloss']:.4f}  "
+              f"ece {r['ece']:.3f}  train {r['train_s']:.2f}s  row {r['latency_us']['compiled_row']}us", flush=True)
+    print(f"📊 SUMMARY: {summary}", flush=True)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump({"summary": summary, "windows": results}, f, indent=2)
@@ -4,6 +4,7 @@ import redis
 import os
 import yfinance as yf
 import datetime
+from services.common.sharding import HISTORY_LENGTH, history_key, partition_channel, partition_of
 
 # Connect to Redis
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
@@ -40,7 +41,14 @@ async def fetch_market_data():
                 }
 
                 # 3. Send to Factory
-                r.publish('market_data', json.dumps(market_data))
+                # Recent history lets any analysis worker rebuild this symbol's state;
+                # the tick itself goes to the channel of the symbol's partition.
+                body = json.dumps(market_data)
+                pipe = r.pipeline(transaction=False)
+                pipe.rpush(history_key(symbol), body)
+                pipe.ltrim(history_key(symbol), -HISTORY_LENGTH, -1)
+                pipe.publish(partition_channel(partition_of(symbol)), body)
+                pipe.execute()
                 print(f"📡 Live: {symbol} @ ${market_data['price']}")
 
             else:
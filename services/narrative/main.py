@@ -43,7 +43,9 @@ def process_stream():
             
             # --- THE FIX: SAVE TO REDIS CACHE ---
             r.set("latest_narrative", story) # <--- Website reads this!
-            # We don't necessarily need to publish this further, saving is enough
+            r.set(f"latest_narrative:{data.get('symbol', 'ASSET')}", story)
+            # Frontend caches keep their narrative fresh from this channel
+            r.publish("narrative_results", json.dumps({"symbol": data.get('symbol', 'ASSET'), "narrative": story}))
 
         except Exception as e:
             print(f"❌ Narrative Error: {e}")
@@ -0,0 +1,209 @@
+// Init Chart Function
+function initChart(symbol) {
+    new TradingView.widget({
+        "autosize": true,
+        "symbol": "CAPITALCOM:US100",
+        "interval": "1",
+        "timezone": "Africa/Johannesburg",
+        "theme": "dark",
+        "style": "1",
+        "locale": "en",
+        "toolbar_bg": "#f1f3f6",
+        "enable_publishing": false,
+        "hide_side_toolbar": false,
+        "allow_symbol_change": false,
+        "container_id": "tv-chart"
+    });
+}
+
+// --- API & UI LOGIC ---
+async function calibrate() {
+    const val = document.getElementById('inp-cfd').value;
+    if(!val) return;
+    const res = await fetch('/api/calibrate-offset', {
+        method: 'POST', headers: {'Content-Type':'application/json'},
+        body: JSON.stringify({ current_cfd_price: parseFloat(val) })
+    });
+}
+
+async function updateRisk() {
+    const bal = document.getElementById('inp-bal').value;
+    const risk = document.getElementById('inp-risk').value;
+    await fetch('/api/update-risk', {
+        method: 'POST', headers: {'Content-Type':'application/json'},
+        body: JSON.stringify({ balance: parseFloat(bal), risk_pct: parseFloat(risk) })
+    });
+}
+
+async function setAsset(asset) {
+    initChart(asset);
+}
+
+async function pushSettings() {
+     // Function stub
+}
+
+// Live state is patched in place from ?since= deltas
+let liveState = null;
+let liveVersion = null;
+
+async function updateLoop() {
+    try {
+        const res = await fetch(liveVersion === null ? '/api/live-data' : `/api/live-data?since=${liveVersion}`);
+        if (res.status === 304) return;
+        const patch = await res.json();
+        liveState = Object.assign(liveState || {}, patch);
+        liveVersion = patch.version;
+        const data = liveState;
+
+        // Top Bar
+        document.getElementById('nav-ticker').innerHTML = `<span class="inline-block w-2 h-2 rounded-full bg-emerald-500 animate-pulse"></span> ${data.settings.asset}: $${data.market_data.price.toLocaleString()}`;
+        if(data.market_data.server_time) document.getElementById('server-clock').innerText = data.market_data.server_time;
+
+        // News
+        const newsEl = document.getElementById('news-status');
+        if(data.news.is_danger) {
+            newsEl.className = "hidden md:block text-xs px-3 py-1 rounded bg-red-900/50 border border-red-500 text-red-200 animate-pulse";
+            newsEl.innerText = "⛔ NEWS HALT: " + data.news.headline;
+        } else {
+            newsEl.className = "hidden md:block text-xs px-3 py-1 rounded bg-slate-800 border border-slate-700 text-slate-400";
+            newsEl.innerText = "📰 News: Clear";
+        }
+
+        // Stats
+        document.getElementById('stat-offset').innerText = data.settings.offset.toFixed(2);
+        document.getElementById('price-display').innerText = "$" + data.market_data.price.toLocaleString(undefined, {minimumFractionDigits: 2});
+
+        // Signal
+        const sigEl = document.getElementById('signal-badge');
+        sigEl.innerText = data.prediction.bias;
+        if(data.prediction.bias === "LONG") sigEl.className = "inline-block px-4 py-2 bg-emerald-600 rounded text-sm font-bold text-white animate-pulse";
+        else if(data.prediction.bias === "SHORT") sigEl.className = "inline-block px-4 py-2 bg-rose-600 rounded text-sm font-bold text-white animate-pulse";
+        else sigEl.className = "inline-block px-4 py-2 bg-slate-800 rounded text-sm font-bold text-slate-400";
+
+        document.getElementById('ai-text').innerText = data.prediction.narrative;
+        const smtEl = document.getElementById('smt-status');
+        const smtElBig = document.getElementById('status-smt-big');
+        if(data.market_data.smt_detected) {
+            smtEl.innerText = "DIVERGENCE"; smtEl.className = "text-xs font-bold text-emerald-400";
+            if(smtElBig) { smtElBig.innerText = "DIVERGENCE"; smtElBig.className = "text-xl font-black text-emerald-500 mt-4 animate-pulse"; }
+        } else {
+            smtEl.innerText = "SYNCED"; smtEl.className = "text-xs font-bold text-rose-500";
+            if(smtElBig) { smtElBig.innerText = "SYNCED"; smtElBig.className = "text-xl font-black text-rose-500 mt-4"; }
+        }
+
+        // [NEW] V4.6 RSI Display
+        const rsiEl = document.getElementById('rsi-status');
+        if(rsiEl && data.market_data.rsi) {
+            rsiEl.innerText = data.market_data.rsi.toFixed(1);
+            if(data.market_data.rsi < 30 || data.market_data.rsi > 70) rsiEl.className = "text-xs font-bold text-rose-500 animate-pulse";
+            else rsiEl.className = "text-xs font-bold text-emerald-500";
+        }
+
+        // Setup
+        const setup = data.prediction.trade_setup;
+        const validEl = document.getElementById('setup-validity');
+        if(validEl) {
+            if(setup.valid) {
+                validEl.innerText = "ACTIVE"; validEl.className = "text-[10px] bg-emerald-600 px-2 py-1 rounded text-white";
+                document.getElementById('setup-entry').innerText = "$" + setup.entry.toLocaleString();
+                document.getElementById('setup-tp').innerText = "$" + setup.tp.toLocaleString();
+                document.getElementById('setup-sl').innerText = "$" + setup.sl.toLocaleString();
+            } else {
+                validEl.innerText = "WAITING"; validEl.className = "text-[10px] bg-slate-800 px-2 py-1 rounded text-slate-400";
+            }
+        }
+
+        // Session
+        const fibEl = document.getElementById('status-fib');
+        const sessionLow = data.market_data.session_low;
+        const sessionHigh = data.market_data.session_high;
+        if (sessionLow > 0) {
+              fibEl.innerText = `${sessionLow.toFixed(2)} - ${sessionHigh.toFixed(2)}`;
+              fibEl.className = "text-sm font-bold text-slate-300 mt-4 text-center";
+        } else {
+              fibEl.innerText = "WAITING FOR DATA";
+        }
+
+        if (data.performance) {
+            const wr = data.performance.win_rate;
+            document.getElementById('win-rate').innerText = wr + "%";
+            document.getElementById('win-bar').style.width = wr + "%";
+        }
+    } catch(e) {}
+}
+
+// --- LOG STREAM (cursor paginated) ---
+let logCursor = null;
+const TERMINAL_LINES = 50;
+
+async function pollLogs() {
+    try {
+        const res = await fetch(logCursor === null ? `/api/logs?limit=${TERMINAL_LINES}` : `/api/logs?after=${logCursor}`);
+        const data = await res.json();
+        logCursor = data.next;
+        if (!data.entries.length) return;
+
+        const term = document.getElementById('terminal');
+        const fresh = data.entries.slice(-TERMINAL_LINES).reverse().map(e => `<div>${e.line}</div>`).join('');
+        term.insertAdjacentHTML('afterbegin', fresh);
+        while (term.children.length > TERMINAL_LINES) term.removeChild(term.lastChild);
+    } catch(e) {}
+}
+
+// --- CONTENT LOGIC (Restored) ---
+const lessons = [
+    { title: "1. SMT Divergence", body: "<b>Smart Money Technique (SMT):</b> This is our 'Lie Detector'. Institutional algorithms often manipulate one index (like NQ) to grab liquidity while holding the other (like ES) steady.<br><br><b>The Rule:</b> If NQ sweeps a Low (makes a lower low) but ES fails to sweep its matching Low (makes a higher low), that is a 'Crack in Correlation'. It confirms that the move down was a trap to sell to retail traders before reversing higher." },
+    { title: "2. The 'Kill Zone' (-2.5 STDV)", body: "<b>Why -2.5 Standard Deviations?</b> We do not guess bottoms. We use math. By projecting the Asia Range size (High - Low) downwards by a factor of 2.5, we identify a statistical 'Exhaustion Point'.<br><br>When price hits this zone, it is mathematically overextended relative to the session's volatility. This is where we stop analysing and start hunting for an entry." },
+    { title: "3. 1-Minute Trigger (BOS + FVG)", body: "<b>The Kill Switch:</b> SMT and STDV are just context. The Trigger confirms the reversal. We switch to the 1-minute chart and demand two things:<br>1. <b>BOS (Break of Structure):</b> Price must break above the last swing high, proving buyers are stepping in.<br>2. <b>FVG (Fair Value Gap):</b> This energetic move must leave behind an imbalance gap. This proves the move was institutional, not random noise." },
+    { title: "4. Drift-Proof Math", body: "<b>The Relative Engine:</b> Different brokers (HFM, Alpha, Capital.com) have different price feeds. A static bot waiting for '$15,000' will fail if your broker is at '$15,010'.<br><br><b>The Solution:</b> ForwardFin V4.6 uses Relative Math. We calculate the percentage distance from the Session High/Low. If the distance is 0.5%, it is 0.5% on EVERY broker. This ensures signals are valid regardless of spread or price drift." },
+    { title: "5. RSI Momentum", body: "<b>Crash Protection:</b> Buying a dip is good. Buying a crash is bad. The RSI (Relative Strength Index) tells us the difference.<br><br><b>The Rule:</b> If price is in the Buy Zone but RSI is below 30 (Vertical Drop), we DO NOT buy. We wait for the RSI to curl back above 30. This confirms that the selling pressure has exhausted and momentum is shifting up." }
+];
+
+function loadLesson(index) {
+    const l = lessons[index];
+    document.getElementById('lesson-title').innerText = l.title;
+    document.getElementById('lesson-body').innerHTML = l.body;
+    document.querySelectorAll('.lesson-card').forEach((el, i) => {
+        if(i === index) el.classList.add('active', 'bg-sky-50', 'border-l-sky-600');
+        else el.classList.remove('active', 'bg-sky-50', 'border-l-sky-600');
+    });
+}
+
+// --- ARCHITECTURE SECTION UPDATED HERE (V4.7) ---
+const architectureData = [
+    { title: "Data Ingestion", badge: "Infrastructure", description: "Connects to Yahoo Finance to fetch real-time 1-minute candle data for NQ=F and ES=F futures contracts.", components: ["yfinance", "Python Requests"] },
+    { title: "Analysis Engine", badge: "Data Science", description: "Resamples 1m data to 5m to find STDV Zones. Calculates live Volatility and detects IFVGs.", components: ["Pandas Resample", "NumPy Math", "Custom Fib Scanner"] },
+
+    // [UPDATED] Corrected text to 2.5 STDV
+    { title: "Strategy Core", badge: "Logic", description: "Hybrid 5m/1m Engine. Waits for 2.5 STDV on 5m, then hunts for 1m BOS+FVG triggers.", components: ["Multi-Timeframe Analysis", "Smart Money Logic"] },
+
+    // [UPDATED] Corrected text to V4.6 Confidence
+    { title: "Alerting Layer", badge: "Notification", description: "When V4.6 confidence is met (>85% via RSI & SMT), constructs a rich embed payload and fires it to the Discord Webhook.", components: ["Discord API", "JSON Payloads"] },
+
+    { title: "User Interface", badge: "Frontend", description: "Responsive dashboard served via FastAPI. Updates DOM elements live via polling.", components: ["FastAPI", "Tailwind CSS", "Chart.js", "TradingView"] }
+];
+
+function selectLayer(index) {
+    document.querySelectorAll('.arch-layer').forEach((el, i) => {
+        if (i === index) el.classList.add('active', 'bg-sky-50', 'border-l-sky-600');
+        else el.classList.remove('active', 'bg-sky-50', 'border-l-sky-600');
+    });
+    const data = architectureData[index];
+    document.getElementById('detail-title').innerText = data.title;
+    document.getElementById('detail-badge').innerText = data.badge;
+    document.getElementById('detail-desc').innerText = data.description;
+    const list = document.getElementById('detail-list');
+    list.innerHTML = '';
+    data.components.forEach(comp => { list.innerHTML += `<li class="flex items-start text-sm text-slate-400"><span class="w-1.5 h-1.5 bg-sky-500 rounded-full mt-1.5 mr-2"></span>${comp}</li>`; });
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    initChart("NQ1!");
+    loadLesson(0);
+    selectLayer(0);
+    updateLoop();
+    pollLogs();
+    setInterval(updateLoop, 2000);
+    setInterval(pollLogs, 2000);
+});
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("requests")
+from services.common import alerts
+
+class Clock:
+    def __init__(self, now): self.now = now
+    def __call__(self): return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(1000.0)
+    monkeypatch.setattr(alerts.time, "monotonic", clock)
+    return clock
+
+def test_key_expires_when_polled_inside_its_deadline_tick(clock):
+    wheel = alerts.TimerWheel()
+    wheel.arm("k", 10.5)
+    clock.now = 1010.2
+    assert wheel.active("k")
+    clock.now = 1011.0
+    assert not wheel.active("k")
+
+def test_keys_expire_on_time_when_polled_every_tick(clock):
+    wheel = alerts.TimerWheel(slots=64)
+    delays = {"short": 3.7, "tick": 5.0, "lap": 100.25}
+    for key, delay in delays.items(): wheel.arm(key, delay)
+    for step in range(1, 1200):
+        clock.now = 1000.0 + step * 0.1
+        for key, delay in delays.items():
+            assert wheel.active(key) == (clock.now < 1000.0 + delay), (key, clock.now)
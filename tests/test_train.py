@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("xgboost")
+from services.inference import registry, train
+
+def dataset(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2026-01-01", periods=rows, freq="h", tz="UTC")
+    df = pd.DataFrame(rng.normal(size=(rows, 3)) * 10 + 50, columns=registry.FEATURES, index=index)
+    df['Target'] = (df['RSI'] + rng.normal(size=rows) * 10 > 50).astype(int)
+    return df
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # MODEL_DIR and FEATURE_DIR are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def test_retrain_with_unchanged_params_is_registered(workdir, monkeypatch):
+    df = dataset(300)
+    monkeypatch.setattr(train, "build_dataset", lambda *args: df)
+    first = train.train(challenge=True)
+    second = train.train(challenge=True)
+    assert first is not None and second is not None
+    assert second["metrics"]["baseline"]["scored"] == "refit"
+    assert registry.latest_version() == second["version"]
+
+def test_current_model_is_scored_on_rows_after_its_window(workdir, monkeypatch):
+    df = dataset(500)
+    monkeypatch.setattr(train, "build_dataset", lambda *args: df.iloc[:300])
+    train.train()
+    X, y = df[registry.FEATURES].to_numpy(), df['Target'].to_numpy()
+    split = int(len(df) * (1 - train.HOLDOUT))
+    _, baseline = train.beats_current(train.fit(X[:split], y[:split]), X, y, df.index, split)
+    assert baseline["scored"] == "unseen"
+    assert baseline["rows"] == len(df) - split